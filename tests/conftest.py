@@ -0,0 +1,6 @@
+import sys
+
+from pathlib import Path
+
+# the tool's modules import each other from the tool folder, as when PatchBundle.py runs
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "tool"))
@@ -0,0 +1,47 @@
+import json
+
+from pathlib import Path
+
+import pytest
+
+from utils.code_parser import Patch
+
+# diffs with svn, hg and git headers, comments, blank and stray header lines, and the rows the parser produced for
+# them before it was rewritten as a single-pass loop
+cases = json.loads((Path(__file__).parent / "data" / "code_parser_golden.json").read_text())
+
+
+def rows(patch: Patch) -> list:
+    return [list(row) for row in patch.rows()]
+
+
+@pytest.mark.parametrize("case", cases)
+def test_feed_matches_the_golden_rows(case):
+    patch = Patch()
+    patch.feed(case['diff'].split('\n'))
+
+    assert rows(patch) == case['rows']
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7])
+def test_feeding_in_chunks_matches_the_golden_rows(chunk_size):
+    for case in cases:
+        lines = case['diff'].split('\n')
+        patch = Patch()
+
+        for start in range(0, len(lines), chunk_size):
+            if chunk_size == 1:
+                patch(lines[start])
+            else:
+                patch.feed(lines[start:start + chunk_size])
+
+        assert rows(patch) == case['rows']
+
+
+def test_iterating_the_diffs_matches_the_golden_rows():
+    for case in cases:
+        patch = Patch()
+        patch.feed(case['diff'].split('\n'))
+
+        assert [[diff.name, diff.lang, hunk.text, hunk.additions, hunk.deletions, hunk.name, hunk.changes]
+                for diff in patch for hunk in diff] == case['rows']
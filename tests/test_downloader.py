@@ -0,0 +1,77 @@
+import hashlib
+import json
+
+from requests import HTTPError, Response
+
+from utils.downloader import DownloadCache
+
+content = b"0123456789" * 100
+url = "https://example.org/source.zip"
+
+
+def response(status: int, body: bytes = b"", headers: dict = None) -> Response:
+    resp = Response()
+    resp.status_code = status
+    resp._content = body
+    resp._content_consumed = True
+    resp.headers.update(headers or {})
+    return resp
+
+
+class FakeDownloader:
+    """Serves content, answering 416 to ranges starting at or past its end as servers do."""
+    def __init__(self, content: bytes):
+        self.content = content
+        self.requests = []
+
+    def get(self, url: str, headers: dict = None, stream: bool = False) -> Response:
+        headers = headers or {}
+        self.requests.append(headers)
+
+        if 'Range' in headers:
+            start = int(headers['Range'][len("bytes="):-1])
+
+            if start >= len(self.content):
+                error = response(416, headers={'Content-Range': f"bytes */{len(self.content)}"})
+                raise HTTPError("416 Range Not Satisfiable", response=error)
+
+            headers = {'ETag': '"v1"', 'Content-Length': str(len(self.content) - start),
+                       'Content-Range': f"bytes {start}-{len(self.content) - 1}/{len(self.content)}"}
+            return response(206, self.content[start:], headers)
+
+        return response(200, self.content, {'ETag': '"v1"', 'Content-Length': str(len(self.content))})
+
+
+def interrupted(tmp_path, part: bytes) -> DownloadCache:
+    """A cache whose last run died with part written but not finalized."""
+    cache = DownloadCache(tmp_path, FakeDownloader(content), revalidate=False)
+    key = hashlib.sha256(url.encode()).hexdigest()
+    cache.partial.mkdir(parents=True)
+    (cache.partial / f"{key}.part").write_bytes(part)
+    (cache.partial / f"{key}.json").write_text(json.dumps({'etag': '"v1"', 'last_modified': None}))
+    return cache
+
+
+def test_a_complete_part_is_finalized_on_416(tmp_path):
+    cache = interrupted(tmp_path, content)
+    out_file = cache.fetch(url, tmp_path / "out" / "source.zip")
+
+    assert out_file.read_bytes() == content
+    assert cache.downloader.requests == [{'Range': f"bytes={len(content)}-", 'If-Range': '"v1"'}]
+    assert cache.index[url]['sha256'] == hashlib.sha256(content).hexdigest()
+    assert not list(cache.partial.iterdir())
+
+
+def test_a_part_past_the_end_is_downloaded_again(tmp_path):
+    cache = interrupted(tmp_path, content + b"stale")
+    out_file = cache.fetch(url, tmp_path / "out" / "source.zip")
+
+    assert out_file.read_bytes() == content
+    assert cache.downloader.requests[-1] == {}
+    assert cache.index[url]['size'] == len(content)
+
+
+def test_a_partial_transfer_is_resumed(tmp_path):
+    cache = interrupted(tmp_path, content[:300])
+
+    assert cache.fetch(url, tmp_path / "out" / "source.zip").read_bytes() == content
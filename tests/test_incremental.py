@@ -0,0 +1,55 @@
+import sqlite3
+
+from pathlib import Path
+
+import pytest
+
+from utils.data_structs import DataPaths
+from utils.dataset import Dataset
+
+
+def paths(root: Path) -> DataPaths:
+    return DataPaths(root=root, collected=root / "collected", transformed=root / "transformed",
+                     filtered=root / "filtered", cache=root / "cache")
+
+
+def transform_columns(patch_file: str, **record) -> dict:
+    if Path(patch_file).read_text() == "boom":
+        raise ValueError(f"cannot parse {patch_file}")
+
+    return {'project': 'p', 'commit': 'c', 'year': '2016', 'number': '1234', 'patches': []}
+
+
+class Records(Dataset):
+    def collect(self, source: str):
+        pass
+
+    def transform(self):
+        pass
+
+
+def cached_rows(root: Path) -> int:
+    with sqlite3.connect(str(root / "cache" / "transform" / "records.sqlite")) as connection:
+        return connection.execute("SELECT COUNT(*) FROM rows").fetchone()[0]
+
+
+def test_a_failed_run_keeps_the_cached_rows_it_did_not_reach(tmp_path):
+    files = [tmp_path / "collected" / f"{i}.patch" for i in range(20)]
+    files[0].parent.mkdir(parents=True)
+
+    for file in files:
+        file.write_text(file.stem)
+
+    records = [{'patch_file': str(file)} for file in files]
+    # batches of 4 records, so the run fails before reaching most of them
+    data_set = Records(name="records", paths=paths(tmp_path), incremental=True, chunk_size=1)
+    data_set.process(transform_columns, records)
+    assert cached_rows(tmp_path) == 20
+
+    files[5].write_text("boom")
+
+    with pytest.raises(ValueError):
+        Records(name="records", paths=paths(tmp_path), incremental=True, chunk_size=1).process(transform_columns,
+                                                                                                records)
+
+    assert cached_rows(tmp_path) == 20
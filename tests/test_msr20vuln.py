@@ -0,0 +1,41 @@
+from pathlib import Path
+
+import pandas as pd
+
+import datasets.msr20vuln as msr20vuln
+from utils.data_structs import DataPaths
+
+
+def paths(root: Path) -> DataPaths:
+    return DataPaths(root=root, collected=root / "collected", transformed=root / "transformed",
+                     filtered=root / "filtered", cache=root / "cache")
+
+
+class FakeFetcher:
+    """Stands in for the mirror fetcher, recording the requested commits."""
+    requested = {}
+
+    def __init__(self, root: Path, workers: int):
+        pass
+
+    def __call__(self, commits: dict) -> dict:
+        FakeFetcher.requested = commits
+        return {(repo, sha): [{'filename': 'src/a.c', 'patch': '@@ -1 +1 @@\n-int a;\n+int b;\n'}]
+                for repo, shas in commits.items() for sha in shas}
+
+
+def test_mirror_commits_are_keyed_on_commit_id(tmp_path, monkeypatch):
+    full_sha = '0123456789abcdef0123456789abcdef01234567'
+    msr20_file = tmp_path / "msr20.csv"
+    # the link holds an abbreviated sha, the commit_id column the full one
+    pd.DataFrame({'commit_id': [full_sha, 'fedcba9876543210fedcba9876543210fedcba98'],
+                  'codeLink': [f"https://github.com/owner/repo/commit/{full_sha[:7]}", None]}).to_csv(msr20_file,
+                                                                                                    index=False)
+    monkeypatch.setattr(msr20vuln, "MirrorFetcher", FakeFetcher)
+    data_set = msr20vuln.MSR20Vuln(name="msr20vuln", paths=paths(tmp_path), mirror=True)
+    data_set._collect_commits(msr20_file)
+
+    assert FakeFetcher.requested == {'owner/repo': [full_sha]}
+    commits = pd.read_csv(str(data_set.commits_file), dtype=str)
+    assert commits['commit_id'].tolist() == [full_sha]
+    assert (Path(commits['dir'][0]) / "a.c").exists()
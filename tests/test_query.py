@@ -0,0 +1,47 @@
+import pandas as pd
+import pytest
+
+from input_parser import parser
+
+
+def test_cve_is_parsed_into_year_and_number():
+    assert parser.parse_args(['query', '-ds', 'nvd', '--cve', 'CVE-2016-2105']).cve == ('2016', '2105')
+
+
+def test_an_invalid_cve_is_an_argparse_error(capsys):
+    with pytest.raises(SystemExit):
+        parser.parse_args(['query', '-ds', 'nvd', '--cve', '2016-2105'])
+
+    assert "invalid CVE id '2016-2105'" in capsys.readouterr().err
+
+
+def test_an_invalid_text_query_is_reported_and_the_store_closed(tmp_path, capsys, monkeypatch):
+    from config import Config, configurations
+    from input_parser import run
+    from utils.data_structs import DataPaths
+    from utils.functions import hunk_columns
+    from utils.hunk_store import HunkStore
+
+    database = tmp_path / "hunks.sqlite"
+    hunk_store = HunkStore(database)
+    hunk = {column: 1 for column in hunk_columns}
+    hunk.update({'project': 'p', 'hunk': '+memcpy(dst, src, len);', 'fingerprint': 7})
+    hunk_store.load('nvd', 'transformed', pd.DataFrame([hunk]))
+    hunk_store.close()
+
+    closed = []
+    monkeypatch.setattr(HunkStore, "close", lambda self: closed.append(self.connection.close()))
+    configs = Config(data_paths=DataPaths(root=tmp_path, collected=tmp_path, transformed=tmp_path, filtered=tmp_path,
+                                          cache=tmp_path), data_sets=configurations.data_sets)
+
+    for text, found in (('memcpy(', None), ('"memcpy("', "1 hunks found.")):
+        args = vars(parser.parse_args(['query', '-ds', 'nvd', '-db', str(database), '-t', text]))
+        run(**args, configs=configs)
+        out = capsys.readouterr().out
+
+        if found:
+            assert found in out
+        else:
+            assert "Invalid --text query 'memcpy('" in out and "FTS5" in out
+
+    assert len(closed) == 2
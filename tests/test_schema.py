@@ -0,0 +1,28 @@
+import pandas as pd
+
+from utils.schema import concat, conform
+from utils.storage import Storage
+
+
+def hunks(cve_year) -> pd.DataFrame:
+    return pd.DataFrame({'project': ['p', 'q'], 'cve_year': cve_year, 'lang': ['.c', '.c'], 'hunk': ['+a', '-b'],
+                         'additions': [1, 0], 'deletions': [0, 1], 'changes': [1, 1]})
+
+
+def test_legacy_int_years_are_cast_to_string_categories(tmp_path):
+    path = tmp_path / "secbench.pkl"
+    # pickles written before the compact schema hold int years
+    hunks([2015, 2016]).to_pickle(str(path))
+    legacy = Storage('pickle').read(path)
+
+    assert legacy['cve_year'].cat.categories.tolist() == ['2015', '2016']
+
+    merged = concat([conform(hunks(['2014', '2015'])), legacy])
+    assert merged['cve_year'].tolist() == ['2014', '2015', '2015', '2016']
+
+
+def test_int_categories_are_renamed_to_strings():
+    frame = conform(hunks(pd.Categorical([2015, None])))
+
+    assert frame['cve_year'].cat.categories.tolist() == ['2015']
+    assert frame['cve_year'].isna().tolist() == [False, True]
@@ -0,0 +1,46 @@
+from pathlib import Path
+
+import pandas as pd
+
+import datasets.secbench as secbench
+from utils.data_structs import DataPaths
+
+
+def paths(root: Path) -> DataPaths:
+    return DataPaths(root=root, collected=root / "collected", transformed=root / "transformed",
+                     filtered=root / "filtered", cache=root / "cache")
+
+
+class FakeFetcher:
+    """Stands in for the mirror fetcher, returning a payload for every requested commit."""
+    def __init__(self, root: Path, workers: int):
+        pass
+
+    def __call__(self, commits: dict) -> dict:
+        return {(repo, sha): [{'filename': f'src/{sha}.c', 'patch': '@@ -1 +1 @@\n-int a;\n+int b;\n'}]
+                for repo, shas in commits.items() for sha in shas}
+
+
+def test_collect_writes_the_commit_dirs(tmp_path, monkeypatch):
+    rows = pd.DataFrame({'owner': ['o', 'o'], 'project': ['p', 'p'], 'sha': ['s1', 's2'], 'sha-p': ['r1', 'r2'],
+                         'Year': [2015, 2016], 'Language': ['c', 'java'], 'Code': ['CVE-2015-1234', None],
+                         'CWE': ['CWE-119', 'CWE-20']})
+
+    def fetch(self, source, out_file):
+        out_file.parent.mkdir(parents=True, exist_ok=True)
+        rows.to_csv(out_file, index=False)
+        return out_file
+
+    monkeypatch.setattr(secbench.SecBench, "fetch", fetch)
+    monkeypatch.setattr(secbench, "MirrorFetcher", FakeFetcher)
+    data_set = secbench.SecBench(name="secbench", paths=paths(tmp_path), mirror=True)
+    data_set.collect("https://example.org/secbench.csv")
+
+    collected = pd.read_csv(tmp_path / "collected" / "secbench" / "secbench.csv")
+    assert collected['sha'].tolist() == ['s1']
+    patch_dir = Path(collected['dir'][0])
+    assert (patch_dir / "s1.c").read_text().startswith('@@')
+
+    # a resumed collect finds every commit done and writes the same csv
+    data_set.collect("https://example.org/secbench.csv")
+    assert pd.read_csv(tmp_path / "collected" / "secbench" / "secbench.csv").equals(collected)
@@ -0,0 +1,59 @@
+import random
+
+from pathlib import Path
+from zipfile import ZipFile
+
+import pandas as pd
+
+from datasets.secretpatch import SecretPatch
+from utils.data_structs import DataPaths
+
+statements = ['x = y + 1;', 'if (len > size) {', 'return -EINVAL;', '}', 'memcpy(dst, src, len);', 'free(ptr);',
+              'ptr = malloc(size); // allocate', 'for (i = 0; i < n; i++) {']
+
+
+def paths(root: Path) -> DataPaths:
+    return DataPaths(root=root, collected=root / "collected", transformed=root / "transformed",
+                     filtered=root / "filtered", cache=root / "cache")
+
+
+def patch(rnd: random.Random) -> str:
+    lines = []
+
+    for _ in range(rnd.randint(1, 3)):
+        path = f"src/{rnd.randint(0, 999)}{rnd.choice(['.c', '.h'])}"
+        lines.extend([f"diff --git a/{path} b/{path}", "index 1a2b3c4..5d6e7f8 100644", f"--- a/{path}",
+                      f"+++ b/{path}"])
+
+        for start in sorted(rnd.sample(range(1, 2000), rnd.randint(1, 4))):
+            lines.append(f"@@ -{start},7 +{start},7 @@")
+            lines.extend(' ' + rnd.choice(statements) for _ in range(3))
+            lines.extend(['-' + rnd.choice(statements), '+' + rnd.choice(statements)])
+            lines.extend(' ' + rnd.choice(statements) for _ in range(3))
+
+    return '\n'.join(lines) + '\n'
+
+
+def transform(root: Path, **options) -> pd.DataFrame:
+    data_set = SecretPatch(name="secretpatch", paths=paths(root), **options)
+    data_set.transform()
+    return pd.read_pickle(str(data_set.transformed_file))
+
+
+def test_parallel_zip_transform_is_identical_to_serial(tmp_path):
+    rnd = random.Random(3)
+    archive = tmp_path / "collected" / "secretpatch" / "SecurityDataset.zip"
+    archive.parent.mkdir(parents=True)
+    (tmp_path / "transformed").mkdir()
+
+    # as collected with --no_extract, transform reads the members straight from the zip
+    with ZipFile(str(archive), 'w') as zf:
+        for i in range(300):
+            name = f"CVE-{rnd.randint(2005, 2020)}-{10000 + i}.a.project.{rnd.getrandbits(40):010x}.patch"
+            zf.writestr(f"cleaned/{name}", patch(rnd))
+
+    serial = transform(tmp_path)
+    parallel = transform(tmp_path, workers=6, chunk_size=4)
+
+    assert len(serial) > 0
+    assert parallel.equals(serial)
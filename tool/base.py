@@ -1,12 +1,19 @@
 #!/usr/bin/env python3
+import json
+import traceback
+
+from contextlib import contextmanager
 from pathlib import Path
-from typing import List, AnyStr
+from typing import List, AnyStr, Dict
 from config import Config
+from utils.metrics import Measure
+from utils.scheduler import Scheduler, Status
 
 
 class Base:
     def __init__(self, configs: Config, name: str, datasets: List[AnyStr] = None, verbose: bool = False,
-                 log_file: str = None, **kwargs):
+                 log_file: str = None, io_jobs: int = 4, cpu_jobs: int = 1, data_format: str = 'pickle',
+                 metrics_out: str = None, profile: str = None, **kwargs):
         """
         :type log_file: str
         :type verbose: bool
@@ -14,16 +21,106 @@ class Base:
         :type sets: List[AnyStr]
         :type name: str
         :type out_path: str
+        :type io_jobs: int
+        :type cpu_jobs: int
+        :type data_format: str
+        :type metrics_out: str
+        :type profile: str
         """
         self.configs = configs
         self.datasets = self.configs.get_data_sets(datasets)
         self.name = name
         self.verbose = verbose
         self.log_file = Path(log_file) if log_file else log_file
+        self.metrics_out = Path(metrics_out) if metrics_out else None
+        self.profile = Path(profile) if profile else None
+        self.metrics = []
+        self.scheduler = Scheduler(io_jobs=io_jobs, cpu_jobs=cpu_jobs, profile_dir=self.profile)
+        self.data_format = data_format
 
         if kwargs:
             self.log(f"Unknown arguments: {kwargs}\n")
 
+    def schedule(self, stage: str, kind: str, **options) -> Dict[str, Status]:
+        """Runs the stage for every selected dataset; a failing dataset is reported and does not stop the others."""
+        options.update({'data_format': self.data_format})
+        statuses = self.scheduler(stage, kind, self.datasets, self.configs.data_paths, options)
+
+        for status in statuses.values():
+            self.log(f"{status}\n" if status.ok else f"{status}\n{status.error}\n")
+
+            if status.metrics:
+                self.metrics.append(status.metrics)
+
+        return statuses
+
+    @contextmanager
+    def measure(self, stage: str, name: str, profile: bool = True):
+        """Measures a step of the operation itself, yielding the counters to fill."""
+        measure = Measure(name=name, stage=stage, profile_dir=self.profile if profile else None)
+
+        with measure:
+            yield measure.counters
+
+        self.metrics.append(measure.metrics)
+
+    def store(self, database: Path, stages: List[str], datasets: List[AnyStr] = None):
+        """Loads the stages of the datasets into the hunk store, one dataset at a time as SQLite has a single writer."""
+        from utils.hunk_store import HunkStore
+
+        hunk_store = HunkStore(database)
+
+        for ds in self.datasets:
+            if datasets is not None and ds.name not in datasets:
+                continue
+
+            try:
+                with self.measure(stage="store", name=ds.name) as counters:
+                    data_set = ds.cls(name=ds.name, paths=self.configs.data_paths, data_format=self.data_format)
+                    data_set.store(hunk_store, stages)
+                    counters.update(data_set.counters)
+            except Exception:
+                error = traceback.format_exc()
+                print(f"store {ds.name}: failed ({error.strip().splitlines()[-1]})")
+                self.log(f"store {ds.name}: failed\n{error}\n")
+
+        hunk_store.close()
+
+    def merge_hunks(self, frames: list, near_dedupe: bool = False, threshold: float = 0.8, keep: str = 'first',
+                    workers: int = 1):
+        """Merges the filtered frames of several datasets into 'merged', optionally dropping near-duplicates."""
+        if len(frames) < 2:
+            return
+
+        # imported here so that the CLI starts without pandas
+        from utils.storage import Storage
+        from utils.functions import merge_frames
+
+        with self.measure(stage="merge", name="merged") as counters:
+            storage = Storage(self.data_format, counters=counters)
+            result = merge_frames(frames)
+
+            if near_dedupe:
+                from utils.near_dedupe import near_dedupe as dedupe
+
+                deduped = dedupe(result, threshold, keep, workers=workers)
+                counters.add('clusters', int(deduped['cluster'].nunique()))
+                counters.add('near_duplicates', len(result) - len(deduped))
+                result = deduped
+
+            print(len(result))
+            storage.write(result, storage.path(self.configs.data_paths.filtered, 'merged'))
+            counters.add('records', sum(len(frame) for frame in frames))
+            counters.add('hunks', len(result))
+
+    def write_metrics(self):
+        if self.metrics_out:
+            self.metrics_out.parent.mkdir(parents=True, exist_ok=True)
+
+            with self.metrics_out.open(mode="w") as mo:
+                json.dump({'operation': self.name, 'stages': [metrics.to_dict() for metrics in self.metrics]}, mo,
+                          indent=2)
+
     def log(self, msg: str):
         if msg and self.log_file:
             with self.log_file.open(mode="a") as lf:
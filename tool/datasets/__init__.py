@@ -1,5 +1,14 @@
-from .nvd import NVD
-from .secbench import SecBench
-from .mozilla import Mozilla
-from .secretpatch import SecretPatch
-from .msr20vuln import MSR20Vuln
+from importlib import import_module
+
+# dataset classes are imported on first access, so that only the selected datasets load their dependencies
+modules = {'NVD': 'nvd', 'SecBench': 'secbench', 'Mozilla': 'mozilla', 'SecretPatch': 'secretpatch',
+           'MSR20Vuln': 'msr20vuln'}
+
+__all__ = list(modules)
+
+
+def __getattr__(name: str):
+    if name in modules:
+        return getattr(import_module(f".{modules[name]}", __name__), name)
+
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -3,39 +3,45 @@ import re
 from pathlib import Path
 
 import pandas as pd
-from requests import get
-
 from utils.dataset import Dataset
+from utils.functions import write_atomic
+from utils.preprocess import year_number, record_args, record_fields, to_records
 from utils.decorators.transform import parse_patch_file
-from utils.decorators.mozilla import parse_commit, parse_year_number
 
 
 # DATASET_COLUMNS (P_ID, P_URL, R_ID, P_COMMIT, ERROR_SIMILARITY, SITUATION, RELEASES, DATE,
 #                  V_ID,CVE, ID_ADVISORIES, V_CLASSIFICATION, V_IMPACT, VULNERABILITY_URL, PRODUCTS)
 
 
-def download_patch(url: str, out_path_file: Path):
-    url = re.sub('&action=diff', '', url)
-    print(f"Downloading from {url}")
+def patch_url(url: str):
+    return re.sub('&action=diff', '', url)
+
+
+def write_patch(out_path_file: Path, response) -> str:
+    # TODO: fix this, for some reason some files contain strange characters that cannot be written
+    raw_diff = response.content.decode("utf-8")
+    write_atomic(out_path_file, raw_diff)
+
+    print(f"Downloaded {out_path_file.name}")
+
+    return str(out_path_file)
+
 
-    try:
-        data = get(url)
-        raw_diff = data.content.decode("utf-8")
+# values of P_COMMIT for patches without a commit
+missing_commits = ["files not c/c++", "log or number not found", "not found similar commit"]
 
-        with out_path_file.open(mode="w") as out:
-            out.write(raw_diff)
 
-    except Exception as e:
-        # TODO: fix this, for some reason some files contain strange characters that cannot be written
-        with open("exceptions.log", "a") as ex:
-            ex.write(f"{out_path_file}:\n{e}\n")
+def preprocess(dataset: pd.DataFrame) -> pd.DataFrame:
+    year, number = year_number(dataset, cve='CVE', date='DATE', date_format='%d-%m-%y %H:%M',
+                               advisories='ID_ADVISORIES')
+    commit = dataset['P_COMMIT'].where(~dataset['P_COMMIT'].isin(missing_commits), "")
+
+    return dataset.assign(project=dataset['PRODUCTS'], commit=commit, year=year, number=number, name='', lang='')
 
 
 @parse_patch_file
-@parse_year_number
-@parse_commit
 def transform_columns(**record):
-    return {'project': record['PRODUCTS']}
+    return record_args(record)
 
 
 class Mozilla(Dataset):
@@ -44,27 +50,26 @@ class Mozilla(Dataset):
 
     def collect(self, source: str):
         dataset = pd.read_csv(self.paths.collected / Path(source))
-        dataset["patch_file"] = len(dataset)*[""]
-
-        for i, row in dataset.iterrows():
-            print(f"Collecting patch {row['P_ID']} for vuln {row['V_ID']}")
-            out_file = self.collected_path / Path(f"{row['P_ID']}_{row['V_ID']}.txt")
-            download_patch(url=row['P_URL'], out_path_file=out_file)
-            dataset.loc[i, 'patch_file'] = str(out_file)
-
-        dataset.to_csv(str(self.paths.collected / Path(source)))
+        jobs = [(self.collected_path / Path(f"{p_id}_{v_id}.txt"), patch_url(url))
+                for p_id, v_id, url in zip(dataset['P_ID'], dataset['V_ID'], dataset['P_URL'])]
+        journal = self.journal()
+        pending = set(journal.pending([out_file for out_file, _ in jobs], retry_failed=self.retry_failed))
+        print(f"Collecting {len(pending)} of {len(jobs)} patches")
+        self.counters.add('records', len(pending))
+
+        with self.downloader() as downloader:
+            downloader.map(journal.track(write_patch), [job for job in jobs if job[0] in pending],
+                           failed=journal.failed)
+
+        # failed downloads are left empty so that transform skips them
+        dataset["patch_file"] = [journal.output(out_file) for out_file, _ in jobs]
+        # written without the index so that collecting again reads back the same columns
+        write_atomic(self.paths.collected / Path(source), dataset.to_csv(index=False))
 
     def transform(self):
         MOZILLA = self.collected_path / Path("mozilla.csv")
         dataset = pd.read_csv(MOZILLA)
         no_nulls = dataset[dataset['patch_file'].notnull()].reset_index()
-        no_nulls.where(pd.notnull(no_nulls), None)
-        records = no_nulls.to_dict(orient='records')
-
-        for record in records:
-            record['name'] = ''
-            record['lang'] = ''
-            patch_record_args = transform_columns(**record)
-            self.__call__(patch_record_args)
-
+        records = to_records(preprocess(no_nulls), record_fields + ['patch_file', 'name', 'lang'])
+        self.process(transform_columns, records)
         self.data_to_pickle()
@@ -1,37 +1,100 @@
 #!/usr/bin/env python3
 
-import urllib.request as request
 import pandas as pd
 
 from pathlib import Path
+from typing import Iterator
 
 from utils.dataset import Dataset
+from utils.commits import write_patches
+from utils.mirror import MirrorFetcher
 # Decorators
-from utils.decorators.msr20 import changes_to_patches, parse_year_number
+from utils.preprocess import year_number, record_args, record_fields, to_records
+from utils.decorators.msr20 import changes_to_patches
+from utils.decorators.transform import parse_patch_dir
+
+# owner and repository of a commit link, the commit itself is the commit_id column
+repo_link_pattern = r'github\.com/([\w.\-]+)/([\w.\-]+)/commit/'
+# the columns transform reads, the function bodies before and after the commit are skipped
+record_columns = ['project', 'commit_id', 'cve_id', 'publish_date', 'files_changed']
+
+
+def preprocess(chunk: pd.DataFrame) -> pd.DataFrame:
+    year, number = year_number(chunk, cve='cve_id', date='publish_date', date_format='%y-%m-%d')
+    return chunk.assign(commit=chunk['commit_id'], year=year, number=number)
+
+
+def read_records(csv_file: Path, chunk_size: int = 10000) -> Iterator[dict]:
+    """Preprocessed records of the CSV with only the record columns, read chunk_size rows at a time."""
+    chunks = pd.read_csv(str(csv_file), usecols=lambda column: column in record_columns, dtype=str,
+                         chunksize=chunk_size)
+
+    for chunk in chunks:
+        yield from to_records(preprocess(chunk), record_fields + ['files_changed'])
 
 
-@parse_year_number
 @changes_to_patches
 def transform_columns(**record):
-    return {'project': record['project'], 'commit': record['commit_id']}
+    return record_args(record)
+
+
+@parse_patch_dir
+def transform_dir_columns(**record):
+    return record_args(record)
+
+
+def transform_record(**record):
+    # commits extracted from local mirrors replace the files_changed column
+    if record['dir']:
+        return transform_dir_columns(**record)
+    return transform_columns(**record)
 
 
 class MSR20Vuln(Dataset):
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
+        self.commits_file = self.collected_path / Path("commits.csv")
 
     def collect(self, source: str):
         self.collected_path.mkdir(parents=True, exist_ok=True)
         out_file_path = self.collected_path / Path("msr20.csv")
-        print(f"Downloading from source {source}")
-        request.urlretrieve(source, str(out_file_path))
+        self.fetch(source, out_file_path)
+
+        if self.mirror:
+            self._collect_commits(out_file_path)
+
+    def _collect_commits(self, msr20_file: Path):
+        links = pd.read_csv(str(msr20_file), usecols=['commit_id', 'codeLink'], dtype=str).dropna()
+        repos = links['codeLink'].str.extract(repo_link_pattern)
+        matches = links.assign(owner=repos[0], project=repos[1]).dropna().drop_duplicates(subset='commit_id')
+        commits = {}
+
+        for owner, project, commit_id in zip(matches['owner'], matches['project'], matches['commit_id']):
+            commits.setdefault(f"{owner}/{project}", []).append(commit_id)
+
+        print(f"Extracting {len(matches)} commits from {len(commits)} mirrors.")
+        fetch_commits = MirrorFetcher(root=self.paths.cache / Path("mirrors"), workers=self.workers)
+        payloads = fetch_commits(commits)
+        commits_dir = self.collected_path / Path("commits")
+        rows = [{'commit_id': commit_id,
+                 'dir': write_patches(commits_dir / Path(f"{repo.replace('/', '_')}_{commit_id}"), files)}
+                for (repo, commit_id), files in payloads.items() if files is not None]
+        pd.DataFrame(rows, columns=['commit_id', 'dir']).to_csv(str(self.commits_file), index=False)
+
+    def inputs(self, record: dict):
+        # records without a commit dir are parsed from their files_changed field alone
+        if record['dir']:
+            return sorted(f for f in Path(record['dir']).iterdir() if f.is_file())
+        return []
 
     def transform(self):
         MSR20 = self.collected_path / Path("msr20.csv")
-        commit_dataset = pd.read_csv(str(MSR20))
-        records = commit_dataset.to_dict(orient='records')
+        commit_dirs = {}
+
+        if self.commits_file.exists():
+            commit_dirs = pd.read_csv(str(self.commits_file), dtype=str).set_index('commit_id')['dir'].to_dict()
 
-        for record in records:
-            patch_record_args = transform_columns(**record)
-            self.__call__(patch_record_args)
+        # records are streamed to process, which consumes them in bounded batches
+        records = ({**record, 'dir': commit_dirs.get(record['commit'])} for record in read_records(MSR20))
+        self.process(transform_record, records)
         self.data_to_pickle()
@@ -1,12 +1,9 @@
-import difflib
-import itertools
-import urllib.request as request
-
 from zipfile import ZipFile
-from pathlib import Path
+from pathlib import Path, PurePath
 
 from utils.dataset import Dataset
-from utils.functions import check_extension
+from utils.diff import unified_diff
+from utils.functions import check_extension, archive_members, read_member
 
 # Decorators
 from utils.decorators.code import remove_comments, split_lines
@@ -14,8 +11,9 @@ from utils.decorators.transform import create_patch
 
 
 class CVEFile:
-    def __init__(self, file: Path):
+    def __init__(self, file: PurePath, archive: Path = None):
         self.file = file
+        self.archive = archive
 
         name_split = self.file.stem.split("CVE")
         self.project = name_split[0].replace('_', '')
@@ -27,34 +25,51 @@ class CVEFile:
         self.name = ''.join(cve_split[4:]) if self.status else ''.join(cve_split[3:])
         self.lang = self.file.suffix
 
+    @property
+    def key(self):
+        return self.project, self.year, self.number, self.name, self.lang
+
     def __eq__(self, other):
         if not isinstance(other, CVEFile):
             return NotImplemented
 
-        return self.project == other.project and self.year == other.year and self.number == other.number \
-               and self.name == other.name and self.lang == other.lang
+        return self.key == other.key
 
     def __str__(self):
         return self.file.name
 
+    def read(self) -> str:
+        if self.archive:
+            return read_member(self.archive, self.file)
+
+        with self.file.open(mode="r") as f:
+            return f.read()
+
 
 @split_lines
 @remove_comments
-def read_cve_file(file_path: Path, replace_target: str):
-    with file_path.open(mode="r") as f:
-        code = f.read()
-        code = code.replace(replace_target, '')
-        return code
+def read_cve_file(cve_file: CVEFile, replace_target: str):
+    code = cve_file.read()
+    code = code.replace(replace_target, '')
+    return code
 
 
 @create_patch
-def files_to_patch(vuln: CVEFile, patched: CVEFile, name: str, lang: str):
-    vuln_lines = read_cve_file(vuln.file, 'VULN_')
-    patched_lines = read_cve_file(patched.file, 'PATCHED_')
+def files_to_patch(vuln: CVEFile, patched: CVEFile, name: str, lang: str, context_lines: int = 3,
+                   diff_algorithm: str = 'difflib'):
+    vuln_lines = read_cve_file(vuln, 'VULN_')
+    patched_lines = read_cve_file(patched, 'PATCHED_')
 
-    # TODO: ADD number of context lines to diff
-    return difflib.unified_diff(vuln_lines,
-                                patched_lines, fromfile=vuln.file.name, tofile=patched.file.name)
+    return unified_diff(vuln_lines, patched_lines, fromfile=vuln.file.name, tofile=patched.file.name,
+                        n=context_lines, algorithm=diff_algorithm)
+
+
+def transform_columns(vuln: CVEFile, patched: CVEFile, context_lines: int = 3, diff_algorithm: str = 'difflib'):
+    patch = files_to_patch(vuln=vuln, patched=patched, name=vuln.name, lang=vuln.lang, context_lines=context_lines,
+                           diff_algorithm=diff_algorithm)
+    # identical files have no diff
+    return {'project': vuln.project, 'commit': '', 'year': vuln.year, 'number': vuln.number,
+            'patches': [patch] if patch else []}
 
 
 class NVD(Dataset):
@@ -67,7 +82,10 @@ class NVD(Dataset):
         out_file = source.split("/")[-1]
         out_file_path = out_path / Path(out_file)
         out_path.mkdir(parents=True, exist_ok=True)
-        request.urlretrieve(source, str(out_file_path))
+        self.fetch(source, out_file_path)
+
+        if not self.extract:
+            return
 
         with ZipFile(str(out_file_path), 'r') as zf:
             print("Extracting zip.")
@@ -77,26 +95,40 @@ class NVD(Dataset):
 
     def transform(self):
         self._map()
+        self.process(transform_columns, self._pairs())
+        self.data_to_pickle()
 
-        for i, (folder, cve_files) in enumerate(self.mapping.items()):
-            if len(cve_files) >= 2:
-                for a, b in itertools.combinations(cve_files, 2):
-                    if not a == b:
-                        continue
+    def inputs(self, record: dict):
+        return [(cve_file.archive, cve_file.file) if cve_file.archive else cve_file.file
+                for cve_file in (record['vuln'], record['patched'])]
 
-                    pair = {a.status.lower(): a, b.status.lower(): b}
+    def _pairs(self):
+        """VULN/PATCHED pairs of the files of each folder with the same key, in the order of their combinations."""
+        for folder, cve_files in self.mapping.items():
+            groups = {}
 
-                    if len(pair) == 1:
-                        continue
+            for position, cve_file in enumerate(cve_files):
+                groups.setdefault(cve_file.key, []).append(position)
 
-                    patch = files_to_patch(**pair, name=a.name, lang=a.lang)
-                    patch_record_args = {'project': a.project, 'commit': '', 'year': a.year, 'number': a.number,
-                                         'patches': [patch]}
-                    self.__call__(patch_record_args)
+            for position, a in enumerate(cve_files):
+                for other in groups[a.key]:
+                    b = cve_files[other]
 
-        self.data_to_pickle()
+                    if other <= position or a.status == b.status or not (a.status and b.status):
+                        continue
+
+                    yield {a.status.lower(): a, b.status.lower(): b, 'context_lines': self.context_lines,
+                           'diff_algorithm': self.diff_algorithm}
 
     def _map(self):
+        archive = self.archive_file()
+
+        if archive:
+            for member in archive_members(archive):
+                if check_extension(member.suffix):
+                    self.mapping.setdefault(member.parent.name, []).append(CVEFile(member, archive))
+            return
+
         for folder in self.collected_path.iterdir():
             self.mapping[folder.name] = [CVEFile(file) for file in folder.iterdir() if check_extension(file.suffix)]
 
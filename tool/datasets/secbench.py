@@ -1,26 +1,32 @@
 #!/usr/bin/env python3
-from collections import Callable
-from functools import wraps
-from urllib import request
+from functools import lru_cache
+from typing import List, Iterable
 
 import pandas as pd
 from pathlib import Path
-from github import Github
 from os.path import dirname
 
+from utils.commits import CommitCache, CommitFetcher, write_patches
+from utils.mirror import MirrorFetcher
 from utils.dataset import Dataset
-from utils.functions import check_extension, parse_cve_id, comment_remover
+from utils.functions import check_extension, parse_cve_id, write_atomic
+from utils.patterns import cve_pattern
+from utils.preprocess import extract_pair, record_args, record_fields, to_records
 from utils.decorators.transform import parse_patch_file
 
 
 ROOT_DIR = dirname(dirname(__file__))
 
-# readk token from file
 
-with open(f'{ROOT_DIR}/token.txt', 'r') as t:
-    token = t.read().splitlines()[0]
+@lru_cache(maxsize=None)
+def github_client():
+    """GitHub client with the token in token.txt, both loaded on first use since only the API fetch needs them."""
+    from github import Github
 
-git = Github(token)
+    with open(f'{ROOT_DIR}/token.txt', 'r') as t:
+        token = t.read().splitlines()[0]
+
+    return Github(token)
 
 
 class Patch:
@@ -36,52 +42,19 @@ class Patch:
         self.repo = f"{self.owner}/{self.project}"
         self.out_dir = out_dir
 
-    def __call__(self) -> str:
-        # print(f"Getting repo {self.repo};")
-        repo = git.get_repo(self.repo)
-        patch_commit = repo.get_commit(sha=self.sha)
-        print(f"Getting commit {self.sha} files for repo {self.repo}")
-        # print(f"Processing commit {self.sha};")
+    def __call__(self, files: List[dict]) -> str:
         patch_dir = self.out_dir / Path(f"{self.owner}_{self.project}_{self.year}_{self.cwe}")
-        print(f"Preparing folder {patch_dir}")
-        patch_dir.mkdir(parents=True, exist_ok=True)
-        for file in patch_commit.files:
-            patch_file = patch_dir / Path(file.filename).name
-
-            if not check_extension(patch_file.suffix):
-                continue
-
-            if file.patch is None:
-                continue
-
-            print(f"Writing file {file.filename}.")
-
-            with patch_file.open(mode="w") as p:
-                p.write(file.patch)
-
-        return str(patch_dir)
-
-
-def parse_number(func: Callable):
-    @wraps(func)
-    def wrapper_parse_year_number(*args, **kwargs):
-        patch_record_args = func(*args, **kwargs)
-        number = ""
-
-        if 'Code' in kwargs and pd.notnull(kwargs["Code"]):
-            _, number = parse_cve_id(kwargs['Code'])
-
-        patch_record_args.update({'number': number})
+        return write_patches(patch_dir, files)
 
-        return patch_record_args
 
-    return wrapper_parse_year_number
+def preprocess(dataset: pd.DataFrame) -> pd.DataFrame:
+    _, number = extract_pair(dataset['Code'], cve_pattern)
+    return dataset.assign(commit=dataset['sha'], year=dataset['Year'], number=number)
 
 
 @parse_patch_file
-@parse_number
 def transform_columns(**record):
-    return {'project': record['project'], 'commit': record['sha'], 'year': record['Year']}
+    return record_args(record)
 
 
 class SecBench(Dataset):
@@ -92,35 +65,64 @@ class SecBench(Dataset):
         self.collected_path.mkdir(parents=True, exist_ok=True)
         out_file = source.split("/")[-1]
         out_file_path = self.collected_path / Path(out_file)
-        print(f"Downloading from source {source}")
-        request.urlretrieve(source, str(out_file_path))
+        self.fetch(source, out_file_path)
         commit_dataset = pd.read_csv(str(out_file_path))
         print(f"Filtering by language.")
         filtered_ext = commit_dataset[commit_dataset.apply(lambda x: check_extension(x.Language), axis=1)].copy(
             deep=True)
-        filtered_ext["dir"] = len(filtered_ext) * [""]
+        patches = [Patch(row, self.collected_path) for _, row in filtered_ext.iterrows()]
+        journal = self.journal()
+        keys = [f"{patch.repo}@{patch.sha}" for patch in patches]
+        pending = set(journal.pending(keys, retry_failed=self.retry_failed))
+        commits = {}
 
-        for i, row in filtered_ext.iterrows():
-            patch = Patch(row, self.collected_path)
-            filtered_ext.loc[i, 'dir'] = patch()
+        for key, patch in zip(keys, patches):
+            if key in pending:
+                commits.setdefault(patch.repo, []).append(patch.sha)
 
-        filtered_ext.to_csv(str(out_file_path))
+        print(f"Fetching {len(pending)} of {len(patches)} commits from {len(commits)} repositories.")
+        self.counters.add('records', len(pending))
+
+        if self.mirror:
+            fetch_commits = MirrorFetcher(root=self.paths.cache / Path("mirrors"), workers=self.workers)
+        else:
+            fetch_commits = CommitFetcher(client=github_client(), workers=self.workers,
+                                          cache=CommitCache(self.paths.cache / Path("github")))
+
+        payloads = fetch_commits(commits) if commits else {}
+
+        for key, patch in zip(keys, patches):
+            if key not in pending:
+                continue
+
+            files = payloads[(patch.repo, patch.sha)]
+
+            if files is None:
+                journal.failed(key, LookupError(f"commit {patch.sha} could not be fetched"))
+            else:
+                journal.done(key, patch(files))
+
+        # commits that could not be fetched are left without a dir
+        filtered_ext["dir"] = [journal.output(key) for key in keys]
+        # the downloaded csv is a link into the download cache, write_atomic replaces it instead of writing through it
+        write_atomic(out_file_path, filtered_ext.to_csv())
 
     def transform(self):
         SECBENCH = self.collected_path / Path("secbench.csv")
         commit_dataset = pd.read_csv(SECBENCH)
-        records = commit_dataset.to_dict(orient='records')
+        records = to_records(preprocess(commit_dataset), record_fields + ['dir'])
+        self.process(transform_columns, self._file_records(records))
+        self.data_to_pickle()
 
+    @staticmethod
+    def _file_records(records: Iterable[dict]):
         for record in records:
+            if pd.isnull(record['dir']):
+                continue
+
             patch_dir = Path(record['dir'])
 
             for f in patch_dir.iterdir():
                 if f.is_dir():
                     continue
-                record['patch_file'] = f
-                record['lang'] = f.suffix
-                record['name'] = f.stem
-                patch_record_args = transform_columns(**record)
-                self.__call__(patch_record_args)
-
-        self.data_to_pickle()
+                yield dict(record, patch_file=f, lang=f.suffix, name=f.stem)
@@ -3,11 +3,11 @@ import re
 import shutil
 
 from pathlib import Path
-from urllib import request
 from zipfile import ZipFile
 from distutils.dir_util import copy_tree
 
 from utils.dataset import Dataset
+from utils.functions import archive_members
 from utils.decorators.transform import parse_patch_file
 
 cve_pattern_secret = r'CVE-(\d{4})-(\d{4,7})\.([\w\-]+)\.([\w\-]+)\.([0-9a-f]{5,40})'
@@ -30,8 +30,10 @@ class SecretPatch(Dataset):
         out_file = source.split("/")[-1]
         out_file_path = out_path / Path(out_file)
         out_path.mkdir(parents=True, exist_ok=True)
-        print(f"Downloading from source {source}")
-        request.urlretrieve(source, str(out_file_path))
+        self.fetch(source, out_file_path)
+
+        if not self.extract:
+            return
 
         with ZipFile(str(out_file_path), 'r') as zf:
             print("Extracting zip.")
@@ -46,8 +48,14 @@ class SecretPatch(Dataset):
         out_file_path.unlink()
 
     def transform(self):
-        for file in self.collected_path.iterdir():
-            record = {"patch_file": file, 'name': '', 'lang': ''}
-            patch_record_args = transform_columns(**record)
-            self.__call__(patch_record_args)
+        archive = self.archive_file()
+
+        if archive:
+            # patch members are not named after C/C++ sources, so they are selected by folder instead of extension
+            records = [{"patch_file": member, "archive": archive, 'name': '', 'lang': ''}
+                       for member in archive_members(archive, folder="cleaned")]
+        else:
+            records = [{"patch_file": file, 'name': '', 'lang': ''} for file in self.collected_path.iterdir()]
+
+        self.process(transform_columns, records)
         self.data_to_pickle()
@@ -10,6 +10,17 @@ patch_parser = argparse.ArgumentParser(add_help=False)
 patch_parser.add_argument('-ds', '--datasets', type=str, nargs='+', help='Name of the datasets.', required=True)
 patch_parser.add_argument('-v', '--verbose', help='Verbose output.', action='store_true')
 patch_parser.add_argument('-l', '--log_file', type=str, default=None, help='Log file to write the results to.')
+patch_parser.add_argument('-f', '--data_format', type=str, default='pickle', choices=['pickle', 'parquet', 'feather'],
+                          help='Storage format of the transformed and filtered data.')
+patch_parser.add_argument('-ij', '--io_jobs', type=int, default=4,
+                          help='Number of datasets processed concurrently in I/O-bound stages (collect, filter).')
+patch_parser.add_argument('-cj', '--cpu_jobs', type=int, default=1,
+                          help='Number of datasets processed concurrently in CPU-bound stages (transform).')
+patch_parser.add_argument('-mo', '--metrics_out', '--metrics-out', type=str, default=None,
+                          help='JSON file to write the metrics of each stage to (wall and CPU time, records/s, bytes '
+                               'read and written, hunks produced and dropped, peak RSS).')
+patch_parser.add_argument('-pr', '--profile', type=str, default=None,
+                          help='Folder to dump a cProfile of each stage to, as <stage>-<dataset>.prof.')
 
 subparsers = parser.add_subparsers()
 
@@ -24,9 +35,17 @@ def add_operation(name: str, operation: Base, description: str):
 
 def run(operation: Base, **kwargs):
     opr = operation(**kwargs)
-    opr()
+
+    # the stages are profiled on their own
+    with opr.measure(stage=opr.name, name="all", profile=False):
+        opr()
+
+    opr.write_metrics()
 
 
 import operations.collect
 import operations.filter
 import operations.transform
+import operations.store
+import operations.query
+import operations.run
@@ -5,18 +5,41 @@ from base import Base
 
 
 class Collect(Base):
-    def __init__(self, **kwargs):
+    def __init__(self, workers: int, rate_limit: float, retries: int, timeout: float, mirror: bool, offline: bool,
+                 no_extract: bool, retry_failed: bool, **kwargs):
         super().__init__(**kwargs)
+        self.workers = workers
+        self.rate_limit = rate_limit
+        self.retries = retries
+        self.timeout = timeout
+        self.mirror = mirror
+        self.offline = offline
+        self.extract = not no_extract
+        self.retry_failed = retry_failed
 
     def __call__(self, *args, **kwargs):
-        for ds in self.datasets:
-            data_set = ds.cls(name=ds.name, paths=self.configs.data_paths)
-            data_set.collect(ds.source)
-            self.log(f"Collected data for {ds.name}\n.")
+        self.schedule("collect", kind="io", workers=self.workers, rate_limit=self.rate_limit, retries=self.retries,
+                      timeout=self.timeout, mirror=self.mirror, offline=self.offline, extract=self.extract,
+                      retry_failed=self.retry_failed)
 
 
 def collect_args(input_parser):
-    pass
+    input_parser.add_argument('-w', '--workers', type=int, default=8, help='Number of concurrent downloads.')
+    input_parser.add_argument('-rl', '--rate_limit', type=float, default=0,
+                              help='Maximum requests per second to the same host (0 for no limit).')
+    input_parser.add_argument('-r', '--retries', type=int, default=3, help='Retries for a failed download.')
+    input_parser.add_argument('-t', '--timeout', type=float, default=30, help='Timeout in seconds for each request.')
+    input_parser.add_argument('-mi', '--mirror', action='store_true', default=False,
+                              help='Reads commits from local bare mirrors (data/cache/mirrors) instead of the '
+                                   'GitHub API (secbench, msr20vuln).')
+    input_parser.add_argument('-o', '--offline', action='store_true', default=False,
+                              help='Uses cached downloads without revalidating them with the source.')
+    input_parser.add_argument('-ne', '--no_extract', action='store_true', default=False,
+                              help='Keeps collected archives as-is, transform reads their members directly '
+                                   '(nvd, secretpatch).')
+    input_parser.add_argument('-rf', '--retry_failed', action='store_true', default=False,
+                              help='Collects again the items that failed in previous runs, which are otherwise '
+                                   'skipped when resuming (mozilla, secbench).')
 
 
 co_parser = add_operation("collect", Collect, 'Collects the data for a given set name.')
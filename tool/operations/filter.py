@@ -1,32 +1,41 @@
 #!/usr/bin/env python3
-from pathlib import Path
-
 from input_parser import add_operation
 from base import Base
-import pandas as pd
 
 
 class Filter(Base):
-    def __init__(self, merge: bool, **kwargs):
+    def __init__(self, merge: bool, near_dedupe: bool, threshold: float, keep: str, workers: int, **kwargs):
         super().__init__(**kwargs)
         self.merge = merge
+        self.near_dedupe = near_dedupe
+        self.threshold = threshold
+        self.keep = keep
+        self.workers = workers
 
     def __call__(self, *args, **kwargs):
-        frames = []
-        for ds in self.datasets:
-            data_set = ds.cls(name=ds.name, paths=self.configs.data_paths)
-            frames.append(data_set.filter())
-            self.log(f"Filtered data for {ds.name}\n.")
+        statuses = self.schedule("filter", kind="io")
+        frames = [status.result for status in statuses.values() if status.ok]
+
+        if self.near_dedupe and not self.merge:
+            print("Near-duplicates are only detected across the merged datasets, use it with --merge.")
 
-        if self.merge and len(frames) > 1:
-            result = pd.concat(frames, ignore_index=True, sort=False)
-            result.drop_duplicates(subset="hunk", keep=False, inplace=True)
-            print(len(result))
-            result.to_pickle(self.configs.data_paths.filtered / Path('merged.pkl'), protocol=4)
+        if self.merge:
+            self.merge_hunks(frames, near_dedupe=self.near_dedupe, threshold=self.threshold, keep=self.keep,
+                             workers=self.workers)
 
 
 def filter_args(input_parser):
     input_parser.add_argument('-m', '--merge', action='store_true', help='Merges the filtered datasets into one.', default=False)
+    input_parser.add_argument('-nd', '--near_dedupe', action='store_true', default=False,
+                              help='Clusters the near-duplicate hunks of the merged datasets (MinHash/LSH), and keeps '
+                                   'one hunk of each cluster per --keep.')
+    input_parser.add_argument('-th', '--threshold', type=float, default=0.8,
+                              help='Estimated Jaccard similarity of the token shingles above which hunks are '
+                                   'near-duplicates.')
+    input_parser.add_argument('-kp', '--keep', choices=['first', 'last', 'all'], default='first',
+                              help='Hunk kept of each cluster; all keeps every hunk with its cluster column.')
+    input_parser.add_argument('-w', '--workers', type=int, default=1,
+                              help='Number of worker processes computing the MinHash signatures.')
 
 
 filter_parser = add_operation("filter", Filter, 'Filters the transformed datasets.')
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+import argparse
+import re
+import sqlite3
+
+from pathlib import Path
+from typing import Tuple
+
+from input_parser import add_operation
+from base import Base
+from operations.store import database_args, stages
+from utils.patterns import cve_pattern
+
+
+class Query(Base):
+    def __init__(self, database: str, cve: Tuple[str, str], project: str, lang: str, changes: int, text: str,
+                 stage: str, limit: int, out_file: str, **kwargs):
+        super().__init__(**kwargs)
+        self.database = Path(database) if database else self.configs.data_paths.root / Path("hunks.sqlite")
+        self.cve = cve
+        self.project = project
+        self.lang = lang
+        self.changes = changes
+        self.text = text
+        self.stage = stage
+        self.limit = limit
+        self.out_file = Path(out_file) if out_file else None
+
+    def __call__(self, *args, **kwargs):
+        # imported here so that the CLI starts without pandas
+        from pandas.io.sql import DatabaseError
+        from utils.hunk_store import HunkStore
+
+        if not self.database.exists():
+            print(f"No hunk store at {self.database}, load one with the store operation.")
+            return
+
+        hunk_store = HunkStore(self.database)
+
+        try:
+            with self.measure(stage="query", name="hunks") as counters:
+                hunks = hunk_store.query(datasets=[ds.name for ds in self.datasets], stage=self.stage,
+                                         project=self.project, cve=self.cve,
+                                         lang=self.lang, changes=self.changes, text=self.text, limit=self.limit)
+                counters.add('hunks', len(hunks))
+        except (sqlite3.OperationalError, DatabaseError) as e:
+            # pandas wraps the sqlite error in a message holding the whole statement
+            print(f"Invalid --text query {self.text!r} ({e.__cause__ or e}): it is FTS5 syntax, quote terms with "
+                  f"special characters as phrases, e.g. '\"memcpy(\"'.")
+            return
+        finally:
+            hunk_store.close()
+
+        print(f"{len(hunks)} hunks found.")
+
+        if self.out_file:
+            hunks.to_csv(str(self.out_file), index=False)
+            return
+
+        for hunk in hunks.itertuples(index=False):
+            cve = f"CVE-{hunk.cve_year}-{hunk.cve_number}" if hunk.cve_number else hunk.cve_year
+            print(f"{hunk.dataset} ({hunk.stage}) {hunk.project} {hunk.commit} {cve} {hunk.name}{hunk.lang}")
+            print(hunk.hunk)
+
+
+def cve_id(value: str) -> Tuple[str, str]:
+    """Year and number of a CVE id; anything else is rejected by argparse."""
+    match = re.search(cve_pattern, value)
+
+    if match is None:
+        raise argparse.ArgumentTypeError(f"invalid CVE id '{value}', expected e.g. CVE-2016-2105")
+
+    return match.group(1), match.group(2)
+
+
+def query_args(input_parser):
+    database_args(input_parser)
+    input_parser.add_argument('-cve', '--cve', type=cve_id, default=None,
+                              help='CVE id of the hunks, e.g. CVE-2016-2105.')
+    input_parser.add_argument('-p', '--project', type=str, default=None, help='Project of the hunks.')
+    input_parser.add_argument('-lg', '--lang', type=str, default=None, help='Extension of the hunks\' files, e.g. .c.')
+    input_parser.add_argument('-ch', '--changes', type=int, default=None, help='Number of changes in the hunks.')
+    input_parser.add_argument('-t', '--text', type=str, default=None,
+                              help='Full-text query over the hunks (FTS5 syntax), e.g. memcpy or "memcpy AND len".')
+    input_parser.add_argument('-sg', '--stage', type=str, choices=stages, default=None,
+                              help='Only the transformed or the filtered hunks.')
+    input_parser.add_argument('-lm', '--limit', type=int, default=20, help='Maximum number of hunks (0 for all).')
+    input_parser.add_argument('-o', '--out_file', type=str, default=None,
+                              help='CSV file to write the hunks to instead of printing them.')
+
+
+query_parser = add_operation("query", Query, 'Queries the hunk store by CVE, project, language, changes and text.')
+query_args(query_parser)
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+from input_parser import add_operation
+from base import Base
+from utils.diff import diff_algorithms
+
+# the stages of each dataset, in the order they run
+stages = ['collect', 'transform', 'filter']
+
+
+class Run(Base):
+    def __init__(self, stages: list, no_cache: bool, force: bool, merge: bool, workers: int, chunk_size: int,
+                 batch_size: int, incremental: bool, context_lines: int, diff_algorithm: str, mirror: bool,
+                 offline: bool, no_extract: bool, **kwargs):
+        super().__init__(**kwargs)
+        self.stages = stages
+        self.cache = not no_cache
+        self.force = force
+        self.merge = merge
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self.batch_size = batch_size
+        self.incremental = incremental
+        self.context_lines = context_lines
+        self.diff_algorithm = diff_algorithm
+        self.mirror = mirror
+        self.offline = offline
+        self.extract = not no_extract
+
+    def __call__(self, *args, **kwargs):
+        # each dataset runs its stages in turn, the datasets run concurrently as in transform
+        statuses = self.schedule("run", kind="cpu", stages=self.stages, cache=self.cache, force=self.force,
+                                 workers=self.workers, chunk_size=self.chunk_size, batch_size=self.batch_size,
+                                 incremental=self.incremental, context_lines=self.context_lines,
+                                 diff_algorithm=self.diff_algorithm, mirror=self.mirror, offline=self.offline,
+                                 extract=self.extract)
+
+        if self.merge:
+            self.merge_hunks([status.result for status in statuses.values()
+                              if status.ok and status.result is not None])
+
+
+def run_args(input_parser):
+    input_parser.add_argument('-sg', '--stages', type=str, nargs='+', choices=stages, default=stages,
+                              help='Stages to run; the others are taken as they are on disk.')
+    input_parser.add_argument('-nc', '--no_cache', action='store_true', default=False,
+                              help='Runs every stage without the stage cache; the transformed hunks pass to the '
+                                   'filter in memory when they fit in a batch, and neither is written.')
+    input_parser.add_argument('-fo', '--force', action='store_true', default=False,
+                              help='Runs the selected stages even if they are up to date.')
+    input_parser.add_argument('-m', '--merge', action='store_true', default=False,
+                              help='Merges the filtered datasets into one.')
+    input_parser.add_argument('-w', '--workers', type=int, default=1,
+                              help='Number of concurrent downloads and of worker processes parsing the records.')
+    input_parser.add_argument('-cs', '--chunk_size', type=int, default=64,
+                              help='Number of records sent to a worker at a time.')
+    input_parser.add_argument('-bs', '--batch_size', type=int, default=50000,
+                              help='Number of hunk rows held in memory before they are flushed to disk.')
+    input_parser.add_argument('-inc', '--incremental', action='store_true', default=False,
+                              help='Reparses only the inputs that changed since the last transform.')
+    input_parser.add_argument('-cl', '--context_lines', type=int, default=3,
+                              help='Number of context lines of the diffs computed from file pairs (nvd).')
+    input_parser.add_argument('-da', '--diff_algorithm', choices=diff_algorithms, default='difflib',
+                              help='Algorithm of the diffs computed from file pairs (nvd).')
+    input_parser.add_argument('-mi', '--mirror', action='store_true', default=False,
+                              help='Reads commits from local bare mirrors instead of the GitHub API (secbench, '
+                                   'msr20vuln).')
+    input_parser.add_argument('-o', '--offline', action='store_true', default=False,
+                              help='Uses cached downloads without revalidating them with the source.')
+    input_parser.add_argument('-ne', '--no_extract', action='store_true', default=False,
+                              help='Keeps collected archives as-is, transform reads their members directly '
+                                   '(nvd, secretpatch).')
+
+
+run_parser = add_operation("run", Run, 'Collects, transforms and filters the datasets, skipping up-to-date stages.')
+run_args(run_parser)
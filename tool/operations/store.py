@@ -0,0 +1,32 @@
+#!/usr/bin/env python3
+from pathlib import Path
+
+from input_parser import add_operation
+from base import Base
+
+stages = ['transformed', 'filtered']
+
+
+class Store(Base):
+    def __init__(self, database: str, stages: list, **kwargs):
+        super().__init__(**kwargs)
+        self.database = Path(database) if database else self.configs.data_paths.root / Path("hunks.sqlite")
+        self.stages = stages
+
+    def __call__(self, *args, **kwargs):
+        self.store(self.database, self.stages)
+
+
+def database_args(input_parser):
+    input_parser.add_argument('-db', '--database', type=str, default=None,
+                              help='SQLite hunk store, data/hunks.sqlite by default.')
+
+
+def store_args(input_parser):
+    database_args(input_parser)
+    input_parser.add_argument('-sg', '--stages', type=str, nargs='+', choices=stages, default=stages,
+                              help='Outputs to load: the transformed hunks and/or the hunks kept by the filter.')
+
+
+store_parser = add_operation("store", Store, 'Loads the transformed and filtered hunks into an indexed SQLite store.')
+store_args(store_parser)
@@ -3,21 +3,50 @@ from pathlib import Path
 
 from input_parser import add_operation
 from base import Base
+from operations.store import database_args
+from utils.diff import diff_algorithms
 
 
 class Transform(Base):
-    def __init__(self, **kwargs):
+    def __init__(self, workers: int, chunk_size: int, batch_size: int, incremental: bool, context_lines: int,
+                 diff_algorithm: str, store: bool, database: str, **kwargs):
         super().__init__(**kwargs)
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self.batch_size = batch_size
+        self.incremental = incremental
+        self.context_lines = context_lines
+        self.diff_algorithm = diff_algorithm
+        self.store_hunks = store
+        self.database = Path(database) if database else self.configs.data_paths.root / Path("hunks.sqlite")
 
     def __call__(self, *args, **kwargs):
-        for ds in self.datasets:
-            data_set = ds.cls(name=ds.name, paths=self.configs.data_paths)
-            data_set.transform()
-            self.log(f"Transformed data for {ds.name}\n.")
+        statuses = self.schedule("transform", kind="cpu", workers=self.workers, chunk_size=self.chunk_size,
+                                 batch_size=self.batch_size, incremental=self.incremental,
+                                 context_lines=self.context_lines, diff_algorithm=self.diff_algorithm)
+
+        if self.store_hunks:
+            transformed = [name for name, status in statuses.items() if status.ok]
+            self.store(self.database, ["transformed"], datasets=transformed)
 
 
 def transform_args(input_parser):
-    pass
+    input_parser.add_argument('-w', '--workers', type=int, default=1,
+                              help='Number of worker processes parsing the records.')
+    input_parser.add_argument('-cs', '--chunk_size', type=int, default=64,
+                              help='Number of records sent to a worker at a time.')
+    input_parser.add_argument('-bs', '--batch_size', type=int, default=50000,
+                              help='Number of hunk rows held in memory before they are flushed to disk.')
+    input_parser.add_argument('-inc', '--incremental', action='store_true', default=False,
+                              help='Reparses only the inputs that changed since the last transform.')
+    input_parser.add_argument('-cl', '--context_lines', type=int, default=3,
+                              help='Number of context lines of the diffs computed from file pairs (nvd).')
+    input_parser.add_argument('-da', '--diff_algorithm', choices=diff_algorithms, default='difflib',
+                              help='Algorithm of the diffs computed from file pairs (nvd); all but difflib run '
+                                   'git diff, which stays fast on large files.')
+    input_parser.add_argument('-st', '--store', action='store_true', default=False,
+                              help='Upserts the transformed hunks into the hunk store.')
+    database_args(input_parser)
 
 
 tr_parser = add_operation("transform", Transform, 'Parses the collected data into a generic format.')
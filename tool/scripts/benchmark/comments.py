@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""Benchmarks the comment stripper against the regex it replaced on generated C sources."""
+import argparse
+import random
+import re
+import sys
+import time
+
+from os.path import dirname, abspath
+
+sys.path.insert(0, dirname(dirname(dirname(abspath(__file__)))))
+
+from utils.comments import strip_comments, strip_lines
+
+pattern = re.compile(r'//.*?$|/\*.*?\*/|\'(?:\\.|[^\\\'])*\'|"(?:\\.|[^\\"])*"', re.DOTALL | re.MULTILINE)
+
+parser = argparse.ArgumentParser(add_help=False)
+parser.add_argument('-l', '--lines', type=int, default=200000, help='Number of lines of the generated source.')
+parser.add_argument('-s', '--seed', type=int, default=0, help='Seed of the generated source.')
+parser.add_argument('-r', '--repeat', type=int, default=3, help='Best of repeat runs.')
+
+
+def regex_remover(code: str):
+    def replacer(match):
+        s = match.group(0)
+        if s.startswith('/'):
+            return " "
+        else:
+            return s
+
+    return re.sub(pattern, replacer, code)
+
+
+def generate_source(lines: int, seed: int) -> str:
+    """C-like source heavy on string and char literals, with line and block comments."""
+    rnd = random.Random(seed)
+    statements = ['x = y + 1;', 'printf("%s: %d\\n", name, value);', "c = '\\'';", 'if (s[i] == \'"\') {', '}',
+                  'puts("/* not a comment */");', 'log("a \\"quoted\\" // text");', 'return 0;']
+    source = []
+
+    for i in range(lines):
+        choice = rnd.random()
+
+        if choice < 0.1:
+            source.append(f"// comment {i} with 'quotes' and \"strings\"")
+        elif choice < 0.15:
+            source.append(f"/* block {i}\n * spanning lines\n */")
+        else:
+            source.append(rnd.choice(statements) + (f" /* {i} */" if choice > 0.9 else ""))
+
+    return '\n'.join(source)
+
+
+def truncated_source(lines: int, seed: int) -> str:
+    """Source cut inside a block comment, like the files of a diff, with opened comments that are never closed."""
+    return generate_source(lines, seed).replace('*/', '') + '\n/* truncated' + '\nx = y; /* z' * (lines // 10)
+
+
+def best_of(func, repeat: int) -> float:
+    timings = []
+
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+
+    return min(timings)
+
+
+def compare(name: str, code: str, repeat: int):
+    chunks = [code[i:i + (1 << 16)] for i in range(0, len(code), 1 << 16)]
+    expected = regex_remover(code)
+
+    if strip_comments(code) != expected or list(strip_lines(chunks)) != expected.split('\n'):
+        raise ValueError(f"comment stripper output differs from the regex on the {name} source.")
+
+    regex = best_of(lambda: regex_remover(code), repeat)
+    stripper = best_of(lambda: strip_comments(code), repeat)
+    streamed = best_of(lambda: list(strip_lines(chunks)), repeat)
+    print(f"{name} source: {len(code) / 2 ** 20:.1f} MiB, {code.count(chr(10)) + 1} lines")
+    print(f"  regex       {regex:.3f}s")
+    print(f"  stripper    {stripper:.3f}s ({regex / stripper:.1f}x)")
+    print(f"  streamed    {streamed:.3f}s (split into lines, in 64 KiB chunks)")
+
+
+if __name__ == '__main__':
+    args = parser.parse_args()
+    compare("generated", generate_source(args.lines, args.seed), args.repeat)
+    compare("truncated", truncated_source(args.lines // 10, args.seed), args.repeat)
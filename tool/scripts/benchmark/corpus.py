@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""Generates a synthetic corpus in the layout of the collected datasets, at a configurable scale."""
+import argparse
+import json
+import random
+
+from pathlib import Path
+from typing import List
+
+import pandas as pd
+
+parser = argparse.ArgumentParser(add_help=False)
+parser.add_argument('-op', '--out_path', type=str, help='Path of the collected folder to write.', required=True)
+parser.add_argument('-sc', '--scale', type=int, default=200, help='Number of items (pairs, patches, rows) per dataset.')
+parser.add_argument('-s', '--seed', type=int, default=0, help='Seed of the corpus.')
+
+statements = ['x = y + 1;', 'if (len > size) {', 'return -EINVAL;', '}', 'memcpy(dst, src, len);',
+              'printf("%s: %d\\n", name, value);', "c = '\\'';", 'buf[i] = 0; /* terminate */',
+              'ptr = malloc(size); // allocate', 'for (i = 0; i < n; i++) {', 'free(ptr);',
+              'log("a \\"quoted\\" // text");', 'err = check(ctx, "/* not a comment */");']
+languages = ['.c', '.h', '.cpp']
+
+
+class Generator:
+    def __init__(self, seed: int = 0):
+        self.random = random.Random(seed)
+        self.cves = set()
+
+    def name(self) -> str:
+        return ''.join(self.random.choice('abcdefghijklmnopqrstuvwxyz') for _ in range(6))
+
+    def sha(self) -> str:
+        return ''.join(self.random.choice('0123456789abcdef') for _ in range(40))
+
+    def cve(self):
+        """A CVE id not generated before, so that items (e.g. the nvd CVE folders) never collide."""
+        while True:
+            cve = str(self.random.randint(2005, 2020)), str(self.random.randint(1000, 99999))
+
+            if cve not in self.cves:
+                self.cves.add(cve)
+                return cve
+
+    def source(self, lines: int) -> List[str]:
+        code = [f"static int {self.name()}(struct ctx *ctx, size_t len)", "{"]
+        code.extend('    ' + self.random.choice(statements) for _ in range(lines))
+        code.extend(["/*", " * block comment", " */", "}"])
+        return code
+
+    def hunk(self, start: int, context: int = 3) -> List[str]:
+        header = self.random.choice(['', f" static int {self.name()}(void)"])
+        lines = [' ' + self.random.choice(statements) for _ in range(context)]
+
+        for _ in range(self.random.randint(1, 3)):
+            lines.extend('-' + self.random.choice(statements) for _ in range(self.random.randint(0, 4)))
+            lines.extend('+' + self.random.choice(statements) for _ in range(self.random.randint(1, 4)))
+            lines.extend(' ' + self.random.choice(statements) for _ in range(context))
+
+        removed = sum(1 for line in lines if not line.startswith('+'))
+        added = sum(1 for line in lines if not line.startswith('-'))
+        return [f"@@ -{start},{removed} +{start},{added} @@{header}"] + lines
+
+    def file_diff(self, git: bool = True) -> List[str]:
+        path = f"src/{self.name()}{self.random.choice(languages)}"
+
+        if git:
+            lines = [f"diff --git a/{path} b/{path}", "index 1a2b3c4..5d6e7f8 100644", f"--- a/{path}",
+                     f"+++ b/{path}"]
+        else:
+            lines = [f"diff -r {self.sha()[:12]} -r {self.sha()[:12]} {path}", f"--- a/{path}", f"+++ b/{path}"]
+
+        for start in sorted(self.random.sample(range(1, 2000), self.random.randint(1, 4))):
+            lines.extend(self.hunk(start))
+
+        return lines
+
+    def patch(self, files: int, git: bool = True) -> str:
+        return '\n'.join(line for _ in range(files) for line in self.file_diff(git)) + '\n'
+
+
+def write_nvd(generator: Generator, out_path: Path, scale: int):
+    """VULN/PATCHED file pairs, one folder per CVE."""
+    for _ in range(scale):
+        year, number = generator.cve()
+        project, name, lang = generator.name(), generator.name(), generator.random.choice(languages)
+        folder = out_path / Path(f"CVE-{year}-{number}")
+        folder.mkdir(parents=True, exist_ok=True)
+        vuln = generator.source(generator.random.randint(20, 200))
+        patched = list(vuln)
+
+        for _ in range(generator.random.randint(1, 5)):
+            patched.insert(generator.random.randint(2, len(patched) - 1), '    ' + generator.random.choice(statements))
+
+        for status, lines in (("VULN", vuln), ("PATCHED", patched)):
+            code = '\n'.join(lines).replace('ctx', f"{status}_ctx")
+            (folder / Path(f"{project}_CVE-{year}-{number}_{status}_{name}{lang}")).write_text(code)
+
+
+def write_secretpatch(generator: Generator, out_path: Path, scale: int):
+    """Git patches named CVE-year-number.x.project.sha.patch."""
+    out_path.mkdir(parents=True, exist_ok=True)
+
+    for _ in range(scale):
+        year, number = generator.cve()
+        file_name = f"CVE-{year}-{number}.a.{generator.name()}.{generator.sha()[:10]}.patch"
+        (out_path / Path(file_name)).write_text(generator.patch(generator.random.randint(1, 3)))
+
+
+def write_msr20vuln(generator: Generator, out_path: Path, scale: int):
+    """CSV rows with files_changed holding the file patches as JSON objects joined by <_**next**_>."""
+    out_path.mkdir(parents=True, exist_ok=True)
+    rows = []
+
+    for _ in range(scale):
+        year, number = generator.cve()
+        project, sha = generator.name(), generator.sha()
+        changes = []
+
+        for _ in range(generator.random.randint(1, 3)):
+            diff = generator.file_diff()
+            changes.append(json.dumps({"filename": diff[2][6:], "patch": '\n'.join(diff[4:])}))
+
+        rows.append({'cve_id': f"CVE-{year}-{number}", 'project': project, 'commit_id': sha,
+                     'codeLink': f"https://github.com/{project}/{project}/commit/{sha}",
+                     'publish_date': f"{year[2:]}-01-01", 'files_changed': "<_**next**_>".join(changes)})
+
+    pd.DataFrame(rows).to_csv(str(out_path / Path("msr20.csv")), index=False)
+
+
+def write_mozilla(generator: Generator, out_path: Path, scale: int):
+    """Mercurial diffs and the mozilla.csv listing them."""
+    out_path.mkdir(parents=True, exist_ok=True)
+    rows = []
+
+    for p_id in range(scale):
+        year, number = generator.cve()
+        patch_file = out_path / Path(f"{p_id}_{p_id}.txt")
+        patch_file.write_text(generator.patch(generator.random.randint(1, 3), git=False))
+        rows.append({'P_ID': p_id, 'V_ID': p_id, 'P_URL': f"https://hg.mozilla.org/{p_id}", 'P_COMMIT': generator.sha(),
+                     'CVE': f"CVE-{year}-{number}", 'ID_ADVISORIES': f"mfsa{year}-01", 'DATE': "01-01-15 10:00",
+                     'PRODUCTS': "firefox", 'patch_file': str(patch_file)})
+
+    pd.DataFrame(rows).to_csv(str(out_path / Path("mozilla.csv")), index=False)
+
+
+writers = {'nvd': write_nvd, 'secretpatch': write_secretpatch, 'msr20vuln': write_msr20vuln, 'mozilla': write_mozilla}
+
+
+def generate(out_path: Path, scale: int, seed: int = 0):
+    generator = Generator(seed)
+
+    for name, writer in writers.items():
+        writer(generator, out_path / Path(name), scale)
+
+
+if __name__ == '__main__':
+    args = parser.parse_args()
+    generate(Path(args.out_path), scale=args.scale, seed=args.seed)
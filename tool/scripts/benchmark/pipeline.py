@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""Times each stage of the transform and filter pipeline in isolation on a synthetic corpus.
+
+Results are written as JSON; given a baseline results file, stages slower than the baseline by more than the
+threshold are reported and the script exits with status 1. Corpus files are generated with corpus.py.
+"""
+import argparse
+import json
+import platform
+import sys
+import tempfile
+import time
+
+from os.path import dirname, abspath
+from pathlib import Path
+from typing import Callable, Dict, List
+
+sys.path.insert(0, dirname(dirname(dirname(abspath(__file__)))))
+
+import pandas as pd
+
+from datasets.nvd import CVEFile
+from scripts.benchmark.corpus import generate
+from utils.code_parser import Patch
+from utils.comments import strip_comments
+from utils.data_structs import DataPaths
+from utils.dataset import Dataset
+from utils.diff import unified_diff
+from utils.functions import merge_frames
+from utils.patch_record import PatchRecord
+from utils.decorators.filter import FilterPlan, chain_rules
+
+parser = argparse.ArgumentParser(add_help=False)
+parser.add_argument('-sc', '--scale', type=int, default=1000, help='Number of items per dataset of the corpus.')
+parser.add_argument('-s', '--seed', type=int, default=0, help='Seed of the corpus.')
+parser.add_argument('-r', '--repeat', type=int, default=3, help='Best of repeat runs of each stage.')
+parser.add_argument('-o', '--out_file', type=str, default=None, help='JSON file to write the results to.')
+parser.add_argument('-b', '--baseline', type=str, default=None, help='JSON results to compare against.')
+parser.add_argument('-th', '--threshold', type=float, default=0.2,
+                    help='Relative slowdown over the baseline reported as a regression.')
+parser.add_argument('-md', '--min_delta', type=float, default=0.005,
+                    help='Slowdown in seconds under which a stage is never reported, to ignore timer noise.')
+
+
+class Bench(Dataset):
+    """Dataset whose hunks are given, to time data_to_pickle and the filters on them."""
+    def collect(self, source: str):
+        pass
+
+    def transform(self):
+        pass
+
+
+def best_of(func: Callable, repeat: int) -> float:
+    timings = []
+
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+
+    return min(timings)
+
+
+def load_corpus(corpus: Path) -> Dict[str, List[str]]:
+    """Raw patch texts of each dataset, and the VULN/PATCHED pairs of nvd as line lists."""
+    texts = {'secretpatch': [f.read_text() for f in sorted((corpus / Path("secretpatch")).iterdir())],
+             'mozilla': [f.read_text() for f in sorted((corpus / Path("mozilla")).glob("*.txt"))]}
+    msr20 = pd.read_csv(str(corpus / Path("msr20vuln") / Path("msr20.csv")))
+    texts['msr20vuln'] = [json.loads(change)["patch"] for files_changed in msr20['files_changed']
+                          for change in files_changed.split("<_**next**_>")]
+    pairs = []
+
+    for folder in sorted((corpus / Path("nvd")).iterdir()):
+        # files are paired by key as in the nvd dataset, a folder may hold several pairs
+        groups = {}
+
+        for cve_file in map(CVEFile, sorted(folder.iterdir())):
+            groups.setdefault(cve_file.key, {})[cve_file.status] = cve_file
+
+        pairs.extend((group["VULN"].read().split('\n'), group["PATCHED"].read().split('\n'))
+                     for group in groups.values() if "VULN" in group and "PATCHED" in group)
+
+    return {'texts': [text for name in ['secretpatch', 'mozilla', 'msr20vuln'] for text in texts[name]],
+            'pairs': pairs}
+
+
+def parse(lines: List[List[str]]) -> List[Patch]:
+    patches = []
+
+    for patch_lines in lines:
+        patch = Patch()
+        patch.feed(patch_lines)
+        patches.append(patch)
+
+    return patches
+
+
+def to_rows(patches: List[Patch]) -> List[dict]:
+    return [row for patch in patches for row in PatchRecord('project', 'commit', '2016', '1234', [patch]).to_dict()]
+
+
+def run(scale: int, seed: int, repeat: int) -> dict:
+    stages = {}
+
+    def timed(stage: str, func: Callable, items: int):
+        seconds = best_of(func, repeat)
+        stages[stage] = {'seconds': seconds, 'items': items}
+        print(f"{stage:<28} {seconds:8.4f}s  {items} items")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        root = Path(tmp_dir)
+        generate(root / Path("collected"), scale=scale, seed=seed)
+        corpus = load_corpus(root / Path("collected"))
+        texts, pairs = corpus['texts'], corpus['pairs']
+
+        timed("diff", lambda: [unified_diff(a, b) for a, b in pairs], len(pairs))
+        timed("remove_comments", lambda: [strip_comments(text) for text in texts], len(texts))
+        lines = [strip_comments(text).split('\n') for text in texts]
+        timed("parse", lambda: parse(lines), len(lines))
+        patches = parse(lines)
+        timed("to_dict", lambda: to_rows(patches), len(patches))
+        rows = to_rows(patches)
+        paths = DataPaths(root=root, collected=root / Path("collected"), transformed=root / Path("transformed"),
+                          filtered=root / Path("filtered"), cache=root / Path("cache"))
+
+        def data_to_pickle():
+            dataset = Bench(name="bench", paths=paths)
+
+            for start in range(0, len(rows), 1000):
+                dataset.spool.extend(rows[start:start + 1000])
+
+            dataset.data_to_pickle()
+
+        timed("data_to_pickle", data_to_pickle, len(rows))
+        bench = Bench(name="bench", paths=paths)
+        frame = bench.storage.read(bench.transformed_file)
+
+        plan = FilterPlan(frame)
+
+        for filter_rule in chain_rules(Dataset.filter):
+            timed(f"filter.{filter_rule.name}", lambda: filter_rule(frame), len(frame))
+            plan.add(filter_rule)
+
+        timed("filter", plan.evaluate, len(frame))
+        # the same hunks in several datasets, as in the corpora the merge deduplicates
+        frames = [frame.sample(frac=0.5, random_state=seed + i) for i in range(4)]
+        timed("merge", lambda: merge_frames([f.copy() for f in frames]), sum(len(f) for f in frames))
+
+    return {'meta': {'python': platform.python_version(), 'pandas': pd.__version__, 'platform': platform.platform(),
+                     'scale': scale, 'seed': seed, 'repeat': repeat},
+            'stages': stages}
+
+
+def compare(results: dict, baseline: dict, threshold: float, min_delta: float) -> List[str]:
+    """Stages slower than in the baseline by more than threshold, and by more than min_delta seconds."""
+    regressions = []
+
+    for stage, result in results['stages'].items():
+        if stage not in baseline['stages']:
+            continue
+
+        base = baseline['stages'][stage]['seconds']
+        ratio = result['seconds'] / base if base else 1
+        flag = "REGRESSION" if ratio > 1 + threshold and result['seconds'] - base > min_delta else ""
+        print(f"{stage:<28} {base:8.4f}s -> {result['seconds']:8.4f}s  {ratio:5.2f}x {flag}")
+
+        if flag:
+            regressions.append(stage)
+
+    return regressions
+
+
+if __name__ == '__main__':
+    args = parser.parse_args()
+    results = run(scale=args.scale, seed=args.seed, repeat=args.repeat)
+
+    if args.out_file:
+        Path(args.out_file).write_text(json.dumps(results, indent=2))
+
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text())
+
+        if baseline['meta']['scale'] != args.scale:
+            print(f"Baseline was run at scale {baseline['meta']['scale']}, timings are not comparable.")
+
+        if compare(results, baseline, args.threshold, args.min_delta):
+            sys.exit(1)
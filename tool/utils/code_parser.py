@@ -2,11 +2,19 @@
 
 import re
 from pathlib import Path
+from typing import Iterable, Iterator, Tuple
 
-from .functions import is_comment
+hunk_header_pattern = re.compile(r"^@@.*@@\s*(.*)$")
+
+
+def is_comment_line(code: str) -> bool:
+    """Same as functions.is_comment on a stripped line, without the regex: /* //, '* ' or a closing */ line."""
+    return code.startswith(('/*', '//', '* ')) or (len(code) > 1 and code[-1] == '/' and not code[:-1].strip('*'))
 
 
 class Hunk:
+    __slots__ = ('name', 'lines', 'additions', 'deletions', 'changes', 'prev')
+
     def __init__(self, name: str, additions: int = 0, deletions: int = 0):
         self.name = name
         self.lines = []
@@ -15,56 +23,38 @@ class Hunk:
         self.changes = 0
         self.prev = ''
 
-    def __call__(self, line: str):
-        # deletions
-        if line.startswith('-'):
-            self.deletions += 1
-            if not self.prev == '-':
-                self.changes += 1
-        # additions
-        elif line.startswith('+'):
-            self.additions += 1
-            if not self.prev == '+':
-                self.changes += 1
-
-        self.prev = line[0]
-        self.lines.append(line)
+    @property
+    def text(self) -> str:
+        return '\n'.join(self.lines)
 
 
 class DiffParser:
+    __slots__ = ('name', 'lang', 'current', 'hunks')
+
     def __init__(self, name: str, lang: str):
         self.name = name
         self.lang = lang
         self.current = Hunk(self.name)
         self.hunks = [self.current]
 
-    def __call__(self, line):
-        # hunk header
-        if line.startswith('@@'):
-            # self.hunks += 1
-            match = re.match(r"^@@.*@@\s*(.*)$", line)
-            name = match.group(1) if match else line
-
-            if name in self.hunks:
-                name += "+"
-
-            self.current = Hunk(name)
-            self.hunks.append(self.current)
-            return True
-
-        if not (line.strip() == '' or
-                line.startswith("index") or
-                is_comment(line) or
-                line.startswith('+++') or
-                line.startswith('---')):
-            self.current(line)
+    def header(self, line: str) -> Hunk:
+        match = hunk_header_pattern.match(line)
+        self.current = Hunk(match.group(1) if match else line)
+        self.hunks.append(self.current)
+        return self.current
 
     def __iter__(self):
-        # since list is already iterable
         return (hunk for hunk in self.hunks if hunk.lines)
 
 
 class Patch:
+    """Line parser of unified diffs (svn, hg and git) into diffs of files and their hunks.
+
+    feed() runs the whole state machine in one loop that dispatches on the first character of each line, so the
+    common lines (context, additions, deletions) cost a few string checks.
+    """
+    __slots__ = ('jump', 'name', 'lang', 'current', 'diffs')
+
     def __init__(self, name: str = '', lang: str = ''):
         self.jump = 0
         self.name = name
@@ -72,34 +62,88 @@ class Patch:
         self.current = DiffParser(name=name, lang=lang)
         self.diffs = [self.current]
 
-    def __call__(self, line):
-        if self.jump > 0:
-            self.jump -= 1
-        elif line.strip().startswith("Index") or line.strip().startswith("index"):
-            file = Path(line.strip().split()[-1])
-            if file.suffix == '' or not file.suffix:
-                self.jump = 3
-            else:
-                self.current = DiffParser(name=file.stem, lang=file.suffix)
-                self.jump = 4
-        elif line.startswith("diff"):
-            line_split = line.split()
-
-            if len(line_split) < 4:
-                return
-
-            file_a = line_split[2][1:]
-            file_b = line_split[3][1:]
-
-            if file_a != file_b:
-                return
-
-            file = Path(file_b)
-            self.current = DiffParser(name=file.stem, lang=file.suffix)
-            self.diffs.append(self.current)
-        elif self.current:
-            self.current(line)
+    def __call__(self, line: str):
+        self.feed((line,))
+
+    def feed(self, lines: Iterable[str]):
+        jump = self.jump
+        diff = self.current
+        hunk = diff.current
+
+        for line in lines:
+            if jump:
+                jump -= 1
+                continue
+
+            if not line:
+                continue
+
+            first = line[0]
+
+            # svn/hg file header, skipping the ---/+++ lines that follow it
+            if first == ' ' or first == 'I' or first == 'i' or first.isspace():
+                if 'ndex' in line:
+                    stripped = line.strip()
+
+                    if stripped.startswith(('Index', 'index')):
+                        file = Path(stripped.split()[-1])
+
+                        if not file.suffix:
+                            jump = 3
+                        else:
+                            # the lines of this file are parsed but, as before, not kept in the diffs
+                            diff = DiffParser(name=file.stem, lang=file.suffix)
+                            hunk = diff.current
+                            jump = 4
+                        continue
+
+                if line.isspace() or ('/' in line or '*' in line) and is_comment_line(line.strip()):
+                    continue
+            # git file header
+            elif first == 'd' and line.startswith('diff'):
+                line_split = line.split()
+
+                if len(line_split) >= 4 and line_split[2][1:] == line_split[3][1:]:
+                    file = Path(line_split[3][1:])
+                    diff = DiffParser(name=file.stem, lang=file.suffix)
+                    hunk = diff.current
+                    self.diffs.append(diff)
+                continue
+            elif first == '@' and line.startswith('@@'):
+                hunk = diff.header(line)
+                continue
+            elif first == '-':
+                if line.startswith('---') or ('/' in line or '*' in line) and is_comment_line(line[1:].strip()):
+                    continue
+
+                hunk.deletions += 1
+
+                if hunk.prev != '-':
+                    hunk.changes += 1
+            elif first == '+':
+                if line.startswith('+++') or ('/' in line or '*' in line) and is_comment_line(line[1:].strip()):
+                    continue
+
+                hunk.additions += 1
+
+                if hunk.prev != '+':
+                    hunk.changes += 1
+            elif ('/' in line or '*' in line) and is_comment_line(line.strip()):
+                continue
+
+            hunk.prev = first
+            hunk.lines.append(line)
+
+        self.jump = jump
+        self.current = diff
+        diff.current = hunk
+
+    def rows(self) -> Iterator[Tuple[str, str, str, int, int, str, int]]:
+        """(name, lang, hunk, additions, deletions, hunk_name, changes) of every non-empty hunk."""
+        for diff in self.diffs:
+            for hunk in diff.hunks:
+                if hunk.lines:
+                    yield diff.name, diff.lang, hunk.text, hunk.additions, hunk.deletions, hunk.name, hunk.changes
 
     def __iter__(self):
-        # since list is already iterable
-        return (diff for diff in self.diffs)
+        return iter(self.diffs)
@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+import re
+
+from functools import lru_cache
+from typing import FrozenSet, Iterable, Iterator, Pattern
+
+literal_end_patterns = {"'": re.compile(r"['\\]"), '"': re.compile(r'["\\]')}
+
+CODE, SLASH, LINE, BLOCK, LITERAL = range(5)
+
+
+@lru_cache(maxsize=None)
+def code_run_pattern(block_failed: bool, quotes_failed: FrozenSet[str]) -> Pattern:
+    """Longest run of code and closed literals, up to a comment or a construct that may not be closed.
+
+    A slash is only part of the run when the next character is known not to open a comment, and the quotes of
+    failed literals (and /* once block comments failed) are plain characters.
+    """
+    special = '/' + ''.join(quote for quote in '\'"' if quote not in quotes_failed)
+    alternatives = [f"[^{special}]+", "/(?=[^/])" if block_failed else "/(?=[^/*])"]
+
+    for quote in '\'"':
+        if quote not in quotes_failed:
+            alternatives.append(f"{quote}[^{quote}\\\\]*(?:\\\\.[^{quote}\\\\]*)*{quote}")
+
+    return re.compile(f"(?:{'|'.join(alternatives)})*", re.DOTALL)
+
+
+class CommentStripper:
+    """Single-pass C/C++ comment stripper, fed with chunks of a source.
+
+    Each comment is replaced by a space, string and char literals are kept, with the same result as the regex
+    //.*?$|/\\*.*?\\*/|'(?:\\\\.|[^\\\\'])*'|"(?:\\\\.|[^\\\\"])*" (DOTALL, MULTILINE) it replaces. In particular a
+    block comment or a literal that is never closed is not one: its opening character is kept and the text after
+    it is scanned again as code. A construct still open at the end of a chunk is held until it is decided.
+    """
+    def __init__(self):
+        self.state = CODE
+        self.held = []
+        self.quote = ''
+        self.escape = False
+        self.star = False
+        # once a block comment or a literal is found unterminated, every later one is unterminated too
+        self.block_failed = False
+        self.quotes_failed = set()
+
+    def feed(self, chunk: str) -> str:
+        if not chunk:
+            return ''
+
+        if self.state == SLASH:
+            self.state = CODE
+            chunk = '/' + chunk
+        elif self.state == LINE:
+            end = chunk.find('\n')
+
+            if end == -1:
+                return ''
+
+            self.state = CODE
+            chunk = chunk[end:]
+        elif self.state == BLOCK:
+            # the */ closing the comment can be split between the chunks
+            if self.star and chunk[0] == '/':
+                resume = 1
+            else:
+                end = chunk.find('*/')
+
+                if end == -1:
+                    self.held.append(chunk)
+                    self.star = chunk[-1] == '*'
+                    return ''
+
+                resume = end + 2
+
+            self.state, self.held = CODE, []
+            return ' ' + self._code(chunk, resume)
+        elif self.state == LITERAL:
+            end = self._literal_end(chunk, 1 if self.escape else 0)
+
+            if end < 0:
+                self.held.append(chunk)
+                return ''
+
+            literal = ''.join(self.held) + chunk[:end + 1]
+            self.state, self.held = CODE, []
+            return literal + self._code(chunk, end + 1)
+
+        return self._code(chunk, 0)
+
+    def close(self) -> str:
+        """Decides the construct still open at the end of the source."""
+        state, self.state = self.state, CODE
+        held, self.held = ''.join(self.held), []
+
+        if state == SLASH:
+            return '/'
+
+        if state == BLOCK:
+            self.block_failed = True
+            return '/' + self._code(held, 1, final=True)
+
+        if state == LITERAL:
+            self.quotes_failed.add(self.quote)
+            return self.quote + self._code(held, 1, final=True)
+
+        return ''
+
+    def _literal_end(self, text: str, start: int) -> int:
+        """Index of the closing quote from start, -1 when the text ends inside the literal (-2 after a backslash)."""
+        pattern = literal_end_patterns[self.quote]
+        self.escape = False
+
+        while True:
+            match = pattern.search(text, start)
+
+            if match is None:
+                return -1
+
+            position = match.start()
+
+            if text[position] == self.quote:
+                return position
+
+            if position + 1 == len(text):
+                self.escape = True
+                return -2
+
+            start = position + 2
+
+    def _code(self, text: str, start: int, final: bool = False) -> str:
+        out = []
+        position = start
+        length = len(text)
+
+        while True:
+            run = code_run_pattern(self.block_failed, frozenset(self.quotes_failed)).match(text, position)
+            opening = run.end()
+            out.append(text[position:opening])
+
+            if opening == length:
+                return ''.join(out)
+
+            char = text[opening]
+
+            if char == '/':
+                if opening + 1 == length:
+                    if final:
+                        out.append('/')
+                    else:
+                        self.state = SLASH
+                    return ''.join(out)
+
+                if text[opening + 1] == '/':
+                    end = text.find('\n', opening + 2)
+                    out.append(' ')
+
+                    if end == -1:
+                        if not final:
+                            self.state = LINE
+                        return ''.join(out)
+
+                    position = end
+                    continue
+
+                end = text.find('*/', opening + 2)
+
+                if end != -1:
+                    out.append(' ')
+                    position = end + 2
+                elif final:
+                    self.block_failed = True
+                    out.append('/')
+                    position = opening + 1
+                else:
+                    self.state = BLOCK
+                    self.held = [text[opening:]]
+                    self.star = length > opening + 2 and text[-1] == '*'
+                    return ''.join(out)
+            else:
+                # the run stops at a quote only when its literal is not closed in this text
+                self.quote = char
+                end = self._literal_end(text, opening + 1)
+
+                if end >= 0:
+                    out.append(text[opening:end + 1])
+                    position = end + 1
+                elif final:
+                    self.quotes_failed.add(char)
+                    out.append(char)
+                    position = opening + 1
+                else:
+                    self.state = LITERAL
+                    self.held = [text[opening:]]
+                    return ''.join(out)
+
+
+def strip_comments(code: str) -> str:
+    stripper = CommentStripper()
+    return stripper.feed(code) + stripper.close()
+
+
+def strip_lines(chunks: Iterable[str]) -> Iterator[str]:
+    """Lines of a source read in chunks, with its comments stripped, as str.split('\\n') would return them."""
+    stripper = CommentStripper()
+    tail = None
+
+    for chunk in chunks:
+        stripped = stripper.feed(chunk)
+
+        if stripped:
+            lines = ((tail or '') + stripped).split('\n')
+            tail = lines.pop()
+            yield from lines
+
+    stripped = stripper.close()
+
+    if tail is not None or stripped:
+        yield from ((tail or '') + stripped).split('\n')
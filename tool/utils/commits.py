@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+import json
+import os
+import threading
+import time
+
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from .functions import check_extension, write_atomic
+
+
+def write_patches(patch_dir: Path, files: List[dict]) -> str:
+    """Writes the C/C++ file patches of a commit payload into one file per changed file."""
+    print(f"Preparing folder {patch_dir}")
+    patch_dir.mkdir(parents=True, exist_ok=True)
+
+    for file in files:
+        patch_file = patch_dir / Path(file['filename']).name
+
+        if not check_extension(patch_file.suffix):
+            continue
+
+        if file['patch'] is None:
+            continue
+
+        print(f"Writing file {file['filename']}.")
+        write_atomic(patch_file, file['patch'])
+
+    return str(patch_dir)
+
+
+class CommitCache:
+    """Commit payloads (list of {'filename', 'patch'}) stored on disk keyed by owner/project@sha."""
+    def __init__(self, root: Path):
+        self.root = root
+
+    def path(self, repo: str, sha: str) -> Path:
+        return self.root / Path(repo) / Path(f"{sha}.json")
+
+    def get(self, repo: str, sha: str) -> Optional[List[dict]]:
+        path = self.path(repo, sha)
+
+        if not path.exists():
+            return None
+
+        with path.open(mode="r") as p:
+            return json.load(p)
+
+    def put(self, repo: str, sha: str, files: List[dict]):
+        path = self.path(repo, sha)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(".tmp")
+
+        with tmp_path.open(mode="w") as p:
+            json.dump(files, p)
+
+        os.replace(str(tmp_path), str(path))
+
+
+class Quota:
+    """Blocks every worker until the GitHub rate limit resets once the remaining calls run out."""
+    def __init__(self, client, reserve: int = 1):
+        self.client = client
+        self.reserve = reserve
+        self.lock = threading.Lock()
+
+    def wait(self):
+        with self.lock:
+            remaining, _ = self.client.rate_limiting
+
+            if remaining > self.reserve:
+                return
+
+            delay = self.client.rate_limiting_resettime - time.time() + 1
+
+            if delay > 0:
+                print(f"Rate limit reached, sleeping {int(delay)}s until reset.")
+                time.sleep(delay)
+
+
+class CommitFetcher:
+    """Fetches the files of many commits, one worker per repository, reusing cached payloads."""
+    def __init__(self, client, cache: CommitCache, workers: int = 8):
+        self.client = client
+        self.cache = cache
+        self.workers = max(1, workers)
+        self.quota = Quota(client)
+
+    def __call__(self, commits: Dict[str, List[str]]) -> Dict[Tuple[str, str], Optional[List[dict]]]:
+        """Maps each (owner/project, sha) to its payload, or None when it could not be fetched."""
+        payloads = {}
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            futures = [executor.submit(self._fetch_repo, repo, shas) for repo, shas in commits.items()]
+
+            for future in as_completed(futures):
+                payloads.update(future.result())
+
+        return payloads
+
+    def _fetch_repo(self, repo_name: str, shas: List[str]):
+        payloads = {(repo_name, sha): self.cache.get(repo_name, sha) for sha in set(shas)}
+        missing = [sha for (_, sha), files in payloads.items() if files is None]
+
+        if not missing:
+            return payloads
+
+        try:
+            self.quota.wait()
+            repo = self.client.get_repo(repo_name)
+        except Exception as e:
+            self._log(repo_name, e)
+            return payloads
+
+        for sha in missing:
+            try:
+                self.quota.wait()
+                print(f"Getting commit {sha} files for repo {repo_name}")
+                commit = repo.get_commit(sha=sha)
+                files = [{'filename': file.filename, 'patch': file.patch} for file in commit.files]
+            except Exception as e:
+                self._log(f"{repo_name}@{sha}", e)
+                continue
+
+            self.cache.put(repo_name, sha, files)
+            payloads[(repo_name, sha)] = files
+
+        return payloads
+
+    @staticmethod
+    def _log(key: str, e: Exception):
+        with open("exceptions.log", "a") as ex:
+            ex.write(f"{key}:\n{e}\n")
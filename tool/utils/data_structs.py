@@ -1,6 +1,7 @@
 #!/usr/bin/env python3
 
 from dataclasses import dataclass
+from importlib import import_module
 from pathlib import Path
 
 
@@ -8,7 +9,13 @@ from pathlib import Path
 class Dataset:
     name: str
     source: str
-    cls: object
+    # 'module:Class' of the dataset, imported when a stage of the dataset runs
+    cls_path: str
+
+    @property
+    def cls(self) -> type:
+        module, _, cls_name = self.cls_path.partition(':')
+        return getattr(import_module(module), cls_name)
 
 
 @dataclass
@@ -17,3 +24,4 @@ class DataPaths:
     collected: Path
     transformed: Path
     filtered: Path
+    cache: Path
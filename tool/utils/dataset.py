@@ -1,34 +1,206 @@
 #!/usr/bin/env python3
-from typing import NoReturn
+from typing import NoReturn, Optional, Callable, Iterable, List, TYPE_CHECKING
 
+import itertools
+import sys
 import pandas as pd
 
 from abc import ABC, abstractmethod
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
 from pathlib import Path
 
 from utils.data_structs import DataPaths
+from utils.functions import open_archive
 from utils.patch_record import PatchRecord
+from utils.storage import Storage, Source
+from utils.spool import HunkSpool
+from utils.hunk_index import HunkIndex
+from utils.manifest import Manifest, Input, code_version
+from utils.stage_cache import StageCache, stage_key
+from utils.journal import Journal
+from utils.metrics import Counters
 
 # Decorators
-from utils.decorators.filter import c_code, two_chunk_changes, no_nulls, max_line_changes
+from utils.decorators.filter import chain_rules, evaluate, c_code, two_chunk_changes, no_nulls, max_line_changes
+
+if TYPE_CHECKING:
+    from utils.downloader import Downloader
+    from utils.hunk_store import HunkStore
+
+
+def to_hunks(transform_columns: Callable, record: dict) -> List[dict]:
+    """Runs the transform_columns decorator chain of a record and returns its hunk rows."""
+    patch_record = PatchRecord(**transform_columns(**record))
+
+    if patch_record.has_patch():
+        return patch_record.to_dict()
+
+    return []
+
+
+def batches(iterable: Iterable, size: int):
+    iterator = iter(iterable)
+
+    while True:
+        batch = list(itertools.islice(iterator, size))
+
+        if not batch:
+            return
+
+        yield batch
+
+
+# stages run in turn by run(), each from the output of the previous one
+pipeline_stages = ['collect', 'transform', 'filter']
 
 
 class Dataset(ABC):
-    def __init__(self, name: str, paths: DataPaths):
+    def __init__(self, name: str, paths: DataPaths, workers: int = 1, rate_limit: float = 0, retries: int = 3,
+                 timeout: float = 30, mirror: bool = False, offline: bool = False,
+                 extract: bool = True, retry_failed: bool = False, chunk_size: int = 64,
+                 data_format: str = 'pickle', batch_size: int = 50000, incremental: bool = False,
+                 context_lines: int = 3, diff_algorithm: str = 'difflib', stages: List[str] = None,
+                 cache: bool = True, force: bool = False):
         self.name = name
-        self.dict_data = []
+        self.workers = workers
+        self.rate_limit = rate_limit
+        self.retries = retries
+        self.timeout = timeout
+        self.mirror = mirror
+        self.offline = offline
+        self.extract = extract
+        self.retry_failed = retry_failed
+        self.chunk_size = chunk_size
         self.paths = paths
         self.collected_path = self.paths.collected / Path(self.name)
-        self.transformed_file = self.paths.transformed / Path(self.name + '.pkl')
-        self.filtered_file = self.paths.filtered / Path(self.name + '.pkl')
+        self.counters = Counters()
+        self.storage = Storage(data_format, counters=self.counters)
+        self.transformed_file = self.storage.path(self.paths.transformed, self.name)
+        self.filtered_file = self.storage.path(self.paths.filtered, self.name)
+        self.batch_size = batch_size
+        self.incremental = incremental
+        self.context_lines = context_lines
+        self.diff_algorithm = diff_algorithm
+        self.stages = stages if stages is not None else pipeline_stages
+        self.cache = cache
+        self.force = force
+        self.index = HunkIndex(self.storage, self.paths.root / Path("index"))
+        self._spool = None
         self.frame = None
 
+    @property
+    def spool(self) -> HunkSpool:
+        """Transformed hunk rows, flushed to disk in batches of batch_size rows."""
+        if self._spool is None:
+            self._spool = HunkSpool(self.storage, self.paths.transformed / Path(f".{self.name}.parts"),
+                                    batch_size=self.batch_size)
+        return self._spool
+
     def __call__(self, patch_record_args: dict) -> NoReturn:
         patch_record = PatchRecord(**patch_record_args)
 
         if patch_record.has_patch():
             patch_records = patch_record.to_dict()
-            self.dict_data.extend(patch_records)
+            self.spool.extend(patch_records)
+
+    def inputs(self, record: dict) -> List[Input]:
+        """The collected files a record is parsed from, which key its cached rows in incremental mode."""
+        patch_file = record.get('patch_file')
+
+        if record.get('archive'):
+            return [(record['archive'], patch_file)]
+
+        if patch_file is not None and Path(patch_file).is_file():
+            return [Path(patch_file)]
+
+        return []
+
+    def process(self, transform_columns: Callable, records: Iterable[dict]) -> NoReturn:
+        """Transforms the records into hunk rows, in a pool of worker processes when workers > 1.
+
+        Records are sent to the workers in chunks and the rows are gathered in record order, so the output
+        is the same as in serial mode. In incremental mode only records whose inputs, fields or parsing code
+        changed since the last run are parsed, the rows of the others come from the manifest.
+        """
+        to_record_hunks = partial(to_hunks, transform_columns)
+        # forked workers would share the file offsets of the archives opened here, each opens its own instead
+        executor = ProcessPoolExecutor(max_workers=self.workers,
+                                       initializer=open_archive.cache_clear) if self.workers > 1 else None
+        manifest, version = None, None
+        parsed_count, total = 0, 0
+
+        if self.incremental:
+            manifest = Manifest(self.paths.cache / Path("transform") / Path(f"{self.name}.sqlite"))
+            module_file = Path(sys.modules[transform_columns.__module__].__file__)
+            version = code_version([module_file, *Path(__file__).parent.rglob("*.py")])
+
+        try:
+            # bounded batches keep the pending records in memory proportional to the pool size
+            for batch in batches(records, max(1, self.workers) * self.chunk_size * 4):
+                keys = [manifest.key(self.inputs(record), record, version) if manifest else None for record in batch]
+                cached = [manifest.get(key) if manifest else None for key in keys]
+                pending = [record for record, rows in zip(batch, cached) if rows is None]
+
+                if executor:
+                    parsed = executor.map(to_record_hunks, pending, chunksize=self.chunk_size)
+                else:
+                    parsed = map(to_record_hunks, pending)
+
+                for key, rows in zip(keys, cached):
+                    if rows is None:
+                        rows = next(parsed)
+
+                        if manifest:
+                            manifest.put(key, rows)
+
+                    self.spool.extend(rows)
+                    self.counters.add('hunks', len(rows))
+
+                parsed_count += len(pending)
+                total += len(batch)
+
+                if manifest:
+                    manifest.commit()
+
+            # only a complete run has seen every record, an interrupted one keeps the rows it did not reach
+            if manifest:
+                print(f"Parsed {parsed_count} of {total} records, dropped {manifest.prune()} stale cache entries.")
+        finally:
+            if executor:
+                executor.shutdown()
+
+            self.counters.add('records', total)
+
+            if manifest:
+                self.counters.add('reused', total - parsed_count)
+                manifest.close()
+
+    def journal(self) -> Journal:
+        """Checkpoint of the items collected for this dataset, which lets an interrupted collect resume."""
+        return Journal(self.paths.cache / Path("journals") / Path(f"{self.name}.jsonl"))
+
+    def downloader(self) -> 'Downloader':
+        # requests is only needed to collect
+        from utils.downloader import Downloader
+
+        return Downloader(workers=self.workers, rate_limit=self.rate_limit, retries=self.retries,
+                          timeout=self.timeout)
+
+    def fetch(self, source: str, out_file: Path) -> Path:
+        """Downloads the source through the content-addressed cache in data/cache/downloads."""
+        from utils.downloader import DownloadCache
+
+        with self.downloader() as downloader:
+            cache = DownloadCache(self.paths.cache / Path("downloads"), downloader, revalidate=not self.offline)
+            out_file = cache.fetch(source, out_file)
+            self.counters.add('bytes_fetched', out_file.stat().st_size)
+            return out_file
+
+    def archive_file(self) -> Optional[Path]:
+        """The collected archive kept by 'collect --no_extract', which transform then reads in place."""
+        archives = sorted(self.collected_path.glob("*.zip"))
+        return archives[0] if archives else None
 
     @abstractmethod
     def collect(self, source: str):
@@ -38,17 +210,101 @@ class Dataset(ABC):
     def transform(self):
         pass
 
+    @evaluate
     @max_line_changes(lines=20)
     @no_nulls
     @two_chunk_changes
     @c_code
     def filter(self):
         print(f"Filtering {self.name}")
-        return pd.read_pickle(filepath_or_buffer=str(self.transformed_file))
+        # hunks the transform kept in memory are filtered without being written
+        if self.frame is not None:
+            return self.frame
+
+        return Source(self.storage, self.storage.locate(self.paths.transformed, self.name))
+
+    def run(self, source: str) -> Optional[pd.DataFrame]:
+        """Runs the selected stages in turn and returns the filtered hunks.
+
+        With the stage cache, a stage is skipped when its key (the fingerprint of its input, the code of the
+        dataset and its options, the filter rules for filter) is the one of its last run and its output is
+        unchanged since; stages that are not selected are taken as they are. Without it, the transformed hunks
+        pass to the filter in memory when they fit in a batch, and neither is written.
+        """
+        cache = StageCache(self.paths.cache / Path("stages") / Path(f"{self.name}.sqlite")) if self.cache else None
+        module_file = Path(sys.modules[type(self).__module__].__file__)
+        version = code_version([module_file, *Path(__file__).parent.rglob("*.py")])
+        rules = repr(chain_rules(type(self).filter))
+        filtered = None
+
+        def filter_stage():
+            nonlocal filtered
+            filtered = self.filter()
+
+            if cache:
+                self.storage.write(filtered, self.filtered_file)
+
+        try:
+            collected = self._stage(cache, "collect", stage_key(source, self.extract, version), self.collected_path,
+                                    lambda: self.collect(source))
+            transformed = self._stage(cache, "transform", stage_key(collected, version, self.context_lines,
+                                                                    self.diff_algorithm, self.storage.data_format),
+                                      self.transformed_file, self.transform)
+            filtered_output = self._stage(cache, "filter", stage_key(transformed, version, rules),
+                                          self.filtered_file, filter_stage)
+        finally:
+            if cache:
+                cache.close()
+
+        if filtered is None and filtered_output and "filter" in self.stages:
+            filtered = self.storage.read(self.filtered_file)
+
+        return filtered
+
+    def _stage(self, cache: Optional[StageCache], stage: str, key: str, output: Path,
+               action: Callable) -> Optional[str]:
+        """Runs the stage unless it is up to date, and returns the fingerprint of its output (None without cache)."""
+        if stage not in self.stages:
+            return cache.fingerprint(output) if cache else None
+
+        if cache is None:
+            action()
+            return None
+
+        fingerprint = None if self.force else cache.lookup(stage, key, output)
+
+        if fingerprint is not None:
+            print(f"{stage} {self.name}: up to date, skipped.")
+            self.counters.add(f'skipped.{stage}', 1)
+            return fingerprint
+
+        action()
+        return cache.record(stage, key, output)
+
+    def store(self, hunk_store: 'HunkStore', stages: List[str]):
+        """Upserts the transformed hunks, and the hunks the filter keeps, into the hunk store."""
+        for stage in stages:
+            if stage == "transformed":
+                frame = self.storage.read(self.storage.locate(self.paths.transformed, self.name))
+            else:
+                frame = self.filter()
+
+            changed = hunk_store.load(self.name, stage, frame)
+            self.counters.add('records', len(frame))
+            self.counters.add('changed', changed)
+            print(f"Stored {len(frame)} {stage} hunks of {self.name}, {changed} rows changed.")
 
     def data_to_pickle(self):
-        frame = pd.DataFrame.from_dict(self.dict_data)
-        print(f"Hunks count: {len(frame)}")
-        frame.drop_duplicates(subset="hunk", keep=False, inplace=True)
-        print(f"Unique hunks count: {len(frame)}")
-        frame.to_pickle(path=self.transformed_file)
+        if not self.cache and not self.spool.parts:
+            # nothing was flushed, the hunks go to the filter in memory
+            self.frame, fingerprints = self.spool.to_frame()
+            unique = len(self.frame)
+        else:
+            fingerprints, unique = self.spool.finalize(self.transformed_file)
+
+        print(f"Hunks count: {len(fingerprints)}")
+        print(f"Unique hunks count: {unique}")
+        self.counters.add('unique_hunks', unique)
+        print(f"Hunks already in other datasets: {self.index.check(self.name, fingerprints)}")
+        self.index.update(self.name, fingerprints)
+        self._spool = None
@@ -1,23 +1,9 @@
 #!/usr/bin/env python3
 
-import re
-
 from functools import wraps
 from typing import Callable
 
-
-def replacer(match):
-    s = match.group(0)
-    if s.startswith('/'):
-        return " "  # note: a space and not an empty string
-    else:
-        return s
-
-
-pattern = re.compile(
-    r'//.*?$|/\*.*?\*/|\'(?:\\.|[^\\\'])*\'|"(?:\\.|[^\\"])*"',
-    re.DOTALL | re.MULTILINE
-)
+from utils.comments import strip_comments, strip_lines
 
 
 def remove_comments(func: Callable):
@@ -26,7 +12,7 @@ def remove_comments(func: Callable):
         code = func(*args, **kwargs)
 
         if code:
-            return re.sub(pattern, replacer, code)
+            return strip_comments(code)
         return code
     return wrapper
 
@@ -42,13 +28,12 @@ def split_lines(func):
 
 
 def clean_code_file(func: Callable):
-    @split_lines
-    @remove_comments
+    """Reads the file returned by func in chunks into its lines, with comments stripped as the chunks are read."""
     @wraps(func)
     def wrapper(*args, **kwargs):
         path = func(*args, **kwargs)
         if path:
             with path.open(mode="r", encoding='utf-8', errors='replace') as f:
-                return f.read()
+                return list(strip_lines(iter(lambda: f.read(1 << 16), '')))
         return path
     return wrapper
@@ -1,10 +1,145 @@
 #!/usr/bin/env python3
 import functools
-from typing import Callable
+from typing import Callable, Iterable, List
+
+import pandas as pd
+
+from utils.storage import Source, Predicate
+
+
+class Rule:
+    """Named boolean mask over the hunks frame, built from vectorized column expressions.
+
+    The predicates are (column, op, value) conditions implied by the mask, which storage pushes down to skip rows.
+    """
+    def __init__(self, name: str, mask: Callable, columns: Iterable[str], params: dict = None,
+                 predicates: List[Predicate] = None):
+        self.name = name
+        self.mask = mask
+        self.columns = list(columns)
+        self.params = params if params else {}
+        self.predicates = predicates if predicates else []
+
+    def __call__(self, frame: pd.DataFrame) -> pd.Series:
+        return self.mask(frame, **self.params)
+
+    def __repr__(self):
+        params = ', '.join(f"{k}={v}" for k, v in self.params.items())
+        return f"{self.name}({params})"
+
+
+class FilterPlan:
+    """Lazy stack of rules over a source frame, evaluated as a single fused mask."""
+    def __init__(self, source):
+        self.source = source
+        self.rules = []
+
+    def add(self, filter_rule: Rule):
+        self.rules.append(filter_rule)
+        return self
+
+    @property
+    def columns(self):
+        return sorted({column for filter_rule in self.rules for column in filter_rule.columns})
+
+    @property
+    def predicates(self):
+        return [predicate for filter_rule in self.rules for predicate in filter_rule.predicates]
+
+    def load(self, columns: List[str] = None) -> pd.DataFrame:
+        if isinstance(self.source, Source):
+            return self.source.read(columns=columns, predicates=self.predicates)
+
+        frame = self.source() if callable(self.source) else self.source
+        return frame[columns] if columns else frame
+
+    def mask(self, frame: pd.DataFrame, counters: dict = None) -> pd.Series:
+        """The fused mask; given counters, the rows each rule drops in turn are added to them."""
+        mask = pd.Series(True, index=frame.index)
+
+        for filter_rule in self.rules:
+            if counters is None:
+                mask &= filter_rule(frame)
+            else:
+                kept = int(mask.sum())
+                mask &= filter_rule(frame)
+                counters[f"dropped.{filter_rule.name}"] = kept - int(mask.sum())
+
+        return mask
+
+    def evaluate(self, columns: List[str] = None, stats: bool = False) -> pd.DataFrame:
+        """The filtered frame, optionally projected to columns so that only those and the rules' are read.
+
+        With stats, the rows skipped by the pushed-down predicates and dropped by each rule are kept in the
+        counters of the frame attrs.
+        """
+        read_columns = columns + [c for c in self.columns if c not in columns] if columns else None
+        frame = self.load(read_columns)
+        counters = None
+
+        if stats:
+            # frames and pickles are loaded whole, nothing is pushed down
+            rows = self.source.rows() if isinstance(self.source, Source) else None
+            rows = len(frame) if rows is None else rows
+            counters = {'records': rows, 'pushed_down': rows - len(frame)}
+
+        frame = frame[self.mask(frame, counters)].reset_index(drop=True)
+        frame = frame[columns] if columns else frame
+
+        if stats:
+            counters['kept'] = len(frame)
+            frame.attrs['counters'] = counters
+
+        return frame
+
+
+def as_plan(source) -> FilterPlan:
+    return source if isinstance(source, FilterPlan) else FilterPlan(source)
+
+
+def rule(columns: Iterable[str], predicates: List[Predicate] = None, **params):
+    """Turns a mask function over the columns into a filter decorator that adds it to the plan."""
+    def decorator_rule(mask: Callable):
+        filter_rule = Rule(mask.__name__, mask, columns, params, predicates)
+
+        def decorator(func: Callable):
+            @functools.wraps(func)
+            def wrapper_rule(*args, **kwargs):
+                return as_plan(func(*args, **kwargs)).add(filter_rule)
+            wrapper_rule.rule = filter_rule
+            return wrapper_rule
+
+        decorator.__name__ = mask.__name__
+        decorator.__doc__ = mask.__doc__
+        decorator.rule = filter_rule
+        return decorator
+    return decorator_rule
+
+
+def chain_rules(func: Callable) -> List[Rule]:
+    """The rules of a decorated filter method, from the outermost decorator in."""
+    rules = []
+
+    while func is not None:
+        # functools.wraps copies the rule of the wrapped function to wrappers that are not rules themselves
+        if hasattr(func, 'rule') and func.rule not in rules:
+            rules.append(func.rule)
+        func = getattr(func, '__wrapped__', None)
+
+    return rules
+
+
+def evaluate(func: Callable):
+    """Evaluates the plan built by the rules below it into the filtered frame."""
+    @functools.wraps(func)
+    def wrapper_evaluate(*args, **kwargs):
+        plan = func(*args, **kwargs)
+        return plan.evaluate(stats=True) if isinstance(plan, FilterPlan) else plan
+    return wrapper_evaluate
 
 
 def reset_index(func: Callable):
-    """Filters dataset by one line changes in the hunk."""
+    """Resets the index of the dataset returned by func."""
     @functools.wraps(func)
     def wrapper_reset_index(*args, **kwargs):
         dataset = func(*args, **kwargs)
@@ -12,69 +147,42 @@ def reset_index(func: Callable):
     return wrapper_reset_index
 
 
-def c_code(func: Callable):
+@rule(columns=['lang'], predicates=[('lang', 'in', ['.c', '.h', '.cpp'])])
+def c_code(frame: pd.DataFrame):
     """Filters dataset by hunks in c code."""
-    @functools.wraps(func)
-    @reset_index
-    def wrapper_c_code(*args, **kwargs):
-        dataset = func(*args, **kwargs)
-        c_code_frame = dataset[dataset.apply(lambda row: row['lang'] in ['.c', '.h', '.cpp'], axis=1)]
-        return c_code_frame
-    return wrapper_c_code
+    return frame['lang'].isin(['.c', '.h', '.cpp'])
 
 
-def equal_adds_dels(func: Callable):
+@rule(columns=['additions', 'deletions'])
+def equal_adds_dels(frame: pd.DataFrame):
     """Filters dataset by equal additions and deletions in the hunk."""
-    @functools.wraps(func)
-    @reset_index
-    def wrapper_equal_adds_dels(*args, **kwargs):
-        dataset = func(*args, **kwargs)
-        eq_frame = dataset.loc[dataset["additions"] == dataset["deletions"]]
-        return eq_frame
-    return wrapper_equal_adds_dels
+    return frame['additions'] == frame['deletions']
 
 
-def one_line_changes(func: Callable):
+@rule(columns=['additions', 'deletions'], predicates=[('additions', '==', 1), ('deletions', '==', 1)])
+def one_line_changes(frame: pd.DataFrame):
     """Filters dataset by one line changes in the hunk."""
-    @functools.wraps(func)
-    @reset_index
-    def wrapper_one_line_changes(*args, **kwargs):
-        dataset = func(*args, **kwargs)
-        one_frame = dataset.loc[dataset["additions"] == 1 & dataset["deletions"] == 1]
-        return one_frame
-    return wrapper_one_line_changes
+    return (frame['additions'] == 1) & (frame['deletions'] == 1)
 
 
-def two_chunk_changes(func: Callable):
+@rule(columns=['changes'], predicates=[('changes', '==', 2)])
+def two_chunk_changes(frame: pd.DataFrame):
     """Filters dataset by two chunks changes in the hunk."""
     # TODO: change name, this filter selects contigous hunk changes
-    @functools.wraps(func)
-    @reset_index
-    def wrapper_two_chunk_changes(*args, **kwargs):
-        dataset = func(*args, **kwargs)
-        two_chunks = dataset.loc[dataset["changes"] == 2]
-        return two_chunks
-    return wrapper_two_chunk_changes
+    return frame['changes'] == 2
 
 
-def no_nulls(func: Callable):
-    """Filters dataset by equal additions and deletions in the hunk."""
-    @functools.wraps(func)
-    @reset_index
-    def wrapper_equal_adds_dels(*args, **kwargs):
-        dataset = func(*args, **kwargs)
-        eq_frame = dataset.loc[(dataset["additions"] > 0) & (dataset["deletions"] > 0)]
-        return eq_frame
-    return wrapper_equal_adds_dels
+@rule(columns=['additions', 'deletions'], predicates=[('additions', '>', 0), ('deletions', '>', 0)])
+def no_nulls(frame: pd.DataFrame):
+    """Filters dataset by hunks with both additions and deletions."""
+    return (frame['additions'] > 0) & (frame['deletions'] > 0)
 
 
 def max_line_changes(lines: int):
-    def decorator_max_changes(func: Callable):
-        """Filters dataset by equal additions and deletions in the hunk."""
-        @functools.wraps(func)
-        @reset_index
-        def wrapper_max_changes(*args, **kwargs):
-            dataset = func(*args, **kwargs)
-            return dataset[dataset.apply(lambda x: x.additions + x.deletions <= lines, axis=1)]
-        return wrapper_max_changes
-    return decorator_max_changes
+    # additions and deletions are never negative, so each of them is bounded by lines too
+    @rule(columns=['additions', 'deletions'], predicates=[('additions', '<=', lines), ('deletions', '<=', lines)],
+          lines=lines)
+    def max_line_changes(frame: pd.DataFrame, lines: int):
+        """Filters dataset by hunks with at most lines added and deleted lines."""
+        return frame['additions'] + frame['deletions'] <= lines
+    return max_line_changes
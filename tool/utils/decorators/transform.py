@@ -1,10 +1,11 @@
 #!/usr/bin/env python3
-from pathlib import Path
+from pathlib import Path, PurePosixPath
 
 from functools import wraps
 from typing import Callable, Union
 from utils.code_parser import Patch
-from .code import clean_code_file
+from utils.functions import read_member
+from .code import clean_code_file, remove_comments, split_lines
 
 
 def create_patch(func: Callable):
@@ -13,8 +14,7 @@ def create_patch(func: Callable):
         lines = func(*args, **kwargs)
         if lines:
             patch = Patch(name=kwargs['name'], lang=kwargs['lang'])
-            for line in lines:
-                patch(line)
+            patch.feed(lines)
             return patch
         return None
     return wrapper_create_patch
@@ -32,14 +32,37 @@ def file_to_patch(patch_file: Union[str, Path], name: str = '', lang: str = '',
     return None
 
 
+@create_patch
+@split_lines
+@remove_comments
+def member_to_patch(archive: Path, patch_file: PurePosixPath, name: str = '', lang: str = '', **kwargs):
+    return read_member(archive, patch_file, encoding='utf-8', errors='replace')
+
+
 def parse_patch_file(func: Callable):
     @wraps(func)
     def wrapper_parse_patch_file(*args, **kwargs):
         patch_record_args = func(*args, **kwargs)
 
-        patch = file_to_patch(**kwargs)
+        if kwargs.get('archive'):
+            patch = member_to_patch(**kwargs)
+        else:
+            patch = file_to_patch(**kwargs)
         patch_record_args.update({'patches': [patch]})
 
         return patch_record_args
 
     return wrapper_parse_patch_file
+
+
+def parse_patch_dir(func: Callable):
+    @wraps(func)
+    def wrapper_parse_patch_dir(*args, **kwargs):
+        patch_record_args = func(*args, **kwargs)
+        patch_files = sorted(f for f in Path(kwargs['dir']).iterdir() if f.is_file())
+        patches = [file_to_patch(patch_file=f, name=f.stem, lang=f.suffix) for f in patch_files]
+        patch_record_args.update({'patches': [patch for patch in patches if patch]})
+
+        return patch_record_args
+
+    return wrapper_parse_patch_dir
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+import difflib
+import shutil
+import subprocess
+import tempfile
+
+from pathlib import Path
+from typing import List
+
+# difflib, or one of the algorithms of git diff
+diff_algorithms = ['difflib', 'myers', 'minimal', 'patience', 'histogram']
+
+
+def git_diff(a: List[str], b: List[str], fromfile: str, tofile: str, n: int, algorithm: str) -> List[str]:
+    """Unified diff of two line lists with git diff --no-index, in the shape difflib.unified_diff gives it.
+
+    Every line is written with a newline so that git sees the same lines, the git headers (diff --git, index,
+    ---, +++) are dropped, and hunk headers are cut after their closing @@ since difflib does not add the
+    enclosing function to them.
+    """
+    if shutil.which("git") is None:
+        raise RuntimeError(f"git is required for the {algorithm} diff algorithm.")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        a_file = Path(tmp_dir, "a", Path(fromfile).name)
+        b_file = Path(tmp_dir, "b", Path(tofile).name)
+
+        for file, lines in ((a_file, a), (b_file, b)):
+            file.parent.mkdir()
+            file.write_text(''.join(line + '\n' for line in lines), encoding='utf-8', errors='replace')
+
+        # exits with 1 when the files differ
+        output = subprocess.run(["git", "diff", "--no-index", "--no-color", "--no-ext-diff", "--text",
+                                 f"--diff-algorithm={algorithm}", f"-U{n}", str(a_file), str(b_file)],
+                                stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=False)
+
+    if output.returncode > 1:
+        raise RuntimeError(output.stderr.decode('utf-8', errors='replace'))
+
+    lines = output.stdout.decode('utf-8', errors='replace').split('\n')
+    diff = [f"--- {fromfile}\n", f"+++ {tofile}\n"]
+
+    for line in lines[next((i for i, line in enumerate(lines) if line.startswith('@@')), len(lines)):]:
+        if line.startswith('@@'):
+            diff.append(line[:line.index('@@', 2) + 2] + '\n')
+        elif line:
+            diff.append(line)
+
+    return diff if len(diff) > 2 else []
+
+
+def unified_diff(a: List[str], b: List[str], fromfile: str = '', tofile: str = '', n: int = 3,
+                 algorithm: str = 'difflib') -> List[str]:
+    """Unified diff of two line lists with n context lines, with difflib or a git diff algorithm."""
+    if algorithm == 'difflib':
+        return list(difflib.unified_diff(a, b, fromfile=fromfile, tofile=tofile, n=n))
+
+    return git_diff(a, b, fromfile, tofile, n, algorithm)
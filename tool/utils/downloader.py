@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+import hashlib
+import json
+import os
+import shutil
+import stat
+import threading
+import time
+
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Tuple, Any, Optional
+from urllib.parse import urlparse
+
+from requests import Session, RequestException, HTTPError
+from requests.adapters import HTTPAdapter
+
+from .manifest import file_digest
+
+
+class RateLimiter:
+    """Spaces out requests to the same host by at least 1/rate seconds."""
+    def __init__(self, rate: float = 0):
+        self.interval = 1 / rate if rate > 0 else 0
+        self.lock = threading.Lock()
+        self.next_slot = {}
+
+    def wait(self, url: str):
+        if not self.interval:
+            return
+
+        host = urlparse(url).netloc
+
+        with self.lock:
+            now = time.monotonic()
+            slot = max(now, self.next_slot.get(host, now))
+            self.next_slot[host] = slot + self.interval
+
+        if slot > now:
+            time.sleep(slot - now)
+
+
+class Downloader:
+    """Thread pool of workers sharing one keep-alive connection pool."""
+    def __init__(self, workers: int = 8, rate_limit: float = 0, retries: int = 3, backoff: float = 0.5,
+                 timeout: float = 30):
+        self.workers = max(1, workers)
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.limiter = RateLimiter(rate_limit)
+        self.session = Session()
+        adapter = HTTPAdapter(pool_connections=self.workers, pool_maxsize=self.workers)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def get(self, url: str, **kwargs):
+        """GET with per-host rate limiting and exponential backoff between attempts."""
+        for attempt in range(self.retries + 1):
+            self.limiter.wait(url)
+
+            try:
+                response = self.session.get(url, timeout=self.timeout, **kwargs)
+                response.raise_for_status()
+                return response
+            except RequestException as e:
+                # client errors other than throttling will not go away by retrying
+                client_error = isinstance(e, HTTPError) and e.response.status_code < 500 \
+                    and e.response.status_code != 429
+
+                if client_error or attempt == self.retries:
+                    raise
+                time.sleep(self.backoff * 2 ** attempt)
+
+    def map(self, handler: Callable[[Any, Any], Any], jobs: Iterable[Tuple[Any, str]],
+            failed: Callable[[Any, Exception], Any] = None) -> Dict[Any, Any]:
+        """Downloads (key, url) jobs concurrently and returns {key: handler(key, response)}.
+
+        The handler runs in the worker as soon as its response arrives; a failed job maps to None and is
+        reported to failed(key, exception).
+        """
+        results = {}
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            futures = {executor.submit(self._fetch, handler, key, url): key for key, url in jobs}
+
+            for future in as_completed(futures):
+                key = futures[future]
+
+                try:
+                    results[key] = future.result()
+                except Exception as e:
+                    with open("exceptions.log", "a") as ex:
+                        ex.write(f"{key}:\n{e}\n")
+                    results[key] = None
+
+                    if failed:
+                        failed(key, e)
+
+        return results
+
+    def head(self, url: str):
+        self.limiter.wait(url)
+        response = self.session.head(url, timeout=self.timeout, allow_redirects=True)
+        response.raise_for_status()
+        return response
+
+    def _fetch(self, handler: Callable[[Any, Any], Any], key: Any, url: str):
+        return handler(key, self.get(url))
+
+    def close(self):
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+
+def validators(response) -> dict:
+    return {'etag': response.headers.get('ETag'), 'last_modified': response.headers.get('Last-Modified')}
+
+
+class DownloadCache:
+    """Content-addressed store of downloaded sources.
+
+    Objects are kept under objects/<sha256> and an index maps each url to its object and the ETag/Last-Modified
+    validators it was served with. Interrupted transfers are resumed with HTTP Range requests.
+    """
+    def __init__(self, root: Path, downloader: Downloader, revalidate: bool = True, chunk_size: int = 1 << 20):
+        self.root = root
+        self.downloader = downloader
+        self.revalidate = revalidate
+        self.chunk_size = chunk_size
+        self.objects = self.root / Path("objects")
+        self.partial = self.root / Path("partial")
+        self.index_file = self.root / Path("index.json")
+        self.index = json.loads(self.index_file.read_text()) if self.index_file.exists() else {}
+
+    def object_path(self, digest: str) -> Path:
+        return self.objects / Path(digest[:2]) / Path(digest)
+
+    def cached(self, url: str) -> Optional[dict]:
+        entry = self.index.get(url)
+
+        if entry:
+            obj = self.object_path(entry['sha256'])
+
+            if obj.exists() and obj.stat().st_size == entry['size']:
+                return entry
+
+        return None
+
+    def fresh(self, entry: dict, url: str) -> bool:
+        """A cached entry is fresh when the server still reports the same validators."""
+        if not self.revalidate:
+            return True
+
+        try:
+            current = validators(self.downloader.head(url))
+        except RequestException as e:
+            print(f"Could not revalidate {url}, using cached copy: {e}")
+            return True
+
+        if current['etag'] and entry['etag']:
+            return current['etag'] == entry['etag']
+
+        if current['last_modified'] and entry['last_modified']:
+            return current['last_modified'] == entry['last_modified']
+
+        return False
+
+    def fetch(self, url: str, out_file: Path) -> Path:
+        """Materializes the content of url at out_file, downloading only when the cached copy is stale."""
+        entry = self.cached(url)
+
+        if entry and self.fresh(entry, url):
+            print(f"Using cached {url}")
+        else:
+            entry = self._download(url)
+
+        self._materialize(self.object_path(entry['sha256']), out_file)
+
+        return out_file
+
+    def _download(self, url: str) -> dict:
+        self.partial.mkdir(parents=True, exist_ok=True)
+        key = hashlib.sha256(url.encode()).hexdigest()
+        part_file = self.partial / Path(f"{key}.part")
+        meta_file = self.partial / Path(f"{key}.json")
+        meta = json.loads(meta_file.read_text()) if meta_file.exists() and part_file.exists() else {}
+        # a partial transfer can only be resumed safely when the server gave a validator for it
+        offset = part_file.stat().st_size if meta.get('etag') or meta.get('last_modified') else 0
+        headers = {}
+
+        if offset:
+            # If-Range makes the server send the whole file again when it changed since the partial transfer
+            headers = {'Range': f"bytes={offset}-", 'If-Range': meta['etag'] or meta['last_modified']}
+            print(f"Resuming {url} from byte {offset}")
+        else:
+            print(f"Downloading from source {url}")
+
+        try:
+            response = self.downloader.get(url, headers=headers, stream=True)
+        except HTTPError as e:
+            if not offset or e.response.status_code != 416:
+                raise
+
+            # the run that completed the part died before finalizing it, or the part is past the end of the source
+            total = e.response.headers.get('Content-Range', '').rpartition('/')[2]
+
+            if total.isdigit() and int(total) == offset:
+                print(f"Finalizing the complete partial download of {url}")
+                return self._finalize(url, part_file, meta_file, meta, file_digest(part_file))
+
+            print(f"Discarding the partial download of {url}")
+            offset = 0
+            response = self.downloader.get(url, stream=True)
+
+        with response:
+            if response.status_code != 206:
+                offset = 0
+
+            meta = validators(response)
+            meta_file.write_text(json.dumps(meta))
+            sha256 = hashlib.sha256()
+
+            if offset:
+                with part_file.open(mode="rb") as part:
+                    for chunk in iter(lambda: part.read(self.chunk_size), b''):
+                        sha256.update(chunk)
+
+            with part_file.open(mode="ab" if offset else "wb") as part:
+                for chunk in response.iter_content(chunk_size=self.chunk_size):
+                    sha256.update(chunk)
+                    part.write(chunk)
+
+            expected = response.headers.get('Content-Range', '').rpartition('/')[2] or \
+                response.headers.get('Content-Length')
+
+        size = part_file.stat().st_size
+
+        if expected and expected.isdigit() and response.headers.get('Content-Encoding') is None \
+                and int(expected) != size:
+            raise IOError(f"Incomplete download of {url}: {size} of {expected} bytes, run collect again to resume.")
+
+        return self._finalize(url, part_file, meta_file, meta, sha256.hexdigest())
+
+    def _finalize(self, url: str, part_file: Path, meta_file: Path, meta: dict, digest: str) -> dict:
+        """Moves the complete part into the objects and indexes it for url."""
+        size = part_file.stat().st_size
+        obj = self.object_path(digest)
+        obj.parent.mkdir(parents=True, exist_ok=True)
+        os.replace(str(part_file), str(obj))
+        # objects are shared through hard links, so they must not be modified in place
+        obj.chmod(stat.S_IRUSR | stat.S_IRGRP | stat.S_IROTH)
+        meta_file.unlink()
+
+        entry = {'sha256': digest, 'size': size, **meta}
+        self.index[url] = entry
+        self._save_index()
+
+        return entry
+
+    def _materialize(self, obj: Path, out_file: Path):
+        out_file.parent.mkdir(parents=True, exist_ok=True)
+
+        if out_file.exists():
+            if out_file.samefile(obj):
+                return
+            out_file.unlink()
+
+        try:
+            os.link(str(obj), str(out_file))
+        except OSError:
+            shutil.copyfile(str(obj), str(out_file))
+
+    def _save_index(self):
+        tmp_file = self.index_file.with_suffix(".tmp")
+        tmp_file.write_text(json.dumps(self.index, indent=1))
+        os.replace(str(tmp_file), str(self.index_file))
@@ -1,15 +1,24 @@
 #!/usr/bin/env python3
 
+import hashlib
+import io
+import os
 import re
-from pathlib import Path
+from functools import lru_cache
+from pathlib import Path, PurePosixPath
 from typing import List
+from zipfile import ZipFile
 
 import pandas as pd
 
 from .patterns import *
+from .comments import strip_comments
+from .schema import concat
 
 cpp_extensions = ['cc', "cpp", 'C', 'cxx', 'c++', 'hh', 'H', 'hxx', "h++", "hpp"]
 c_extensions = ['c', 'h']
+hunk_columns = ['project', 'commit', 'cve_year', 'cve_number', 'name', 'lang', 'hunk', 'additions', 'deletions',
+                'hunk_name', 'changes', 'fingerprint']
 frame_columns = ['project', 'patch', 'cve_year', 'cve_number', 'name', 'lang', 'hunk', 'additions', 'deletions',
                  'hunk_name']
 
@@ -23,11 +32,68 @@ def parse_cve_id(cve_id: str):
     return match.group(1), match.group(2)
 
 
+def fingerprint(hunk: str) -> int:
+    """Signed 64-bit hash of the hunk with trailing whitespace stripped from every line."""
+    normalized = '\n'.join(line.rstrip() for line in hunk.split('\n'))
+    return int.from_bytes(hashlib.blake2b(normalized.encode(), digest_size=8).digest(), 'little', signed=True)
+
+
+def write_atomic(path: Path, text: str):
+    """Writes text to a temporary sibling of path that replaces it, so readers never see a partial file."""
+    tmp_path = path.with_name(f".{path.name}.tmp")
+
+    with tmp_path.open(mode="w") as out:
+        out.write(text)
+
+    os.replace(str(tmp_path), str(path))
+
+
+def add_fingerprints(frame: pd.DataFrame) -> pd.DataFrame:
+    """Adds the fingerprint column to frames written before it existed."""
+    if 'fingerprint' not in frame.columns:
+        frame['fingerprint'] = [fingerprint(hunk) for hunk in frame['hunk']]
+    return frame
+
+
+def merge_frames(frames: List[pd.DataFrame]) -> pd.DataFrame:
+    """Concatenates the frames of several datasets, dropping every hunk that occurs more than once."""
+    result = concat([add_fingerprints(frame) for frame in frames])
+    return result[~result['fingerprint'].duplicated(keep=False)]
+
+
 def check_extension(ext):
     ext = ''.join(ext.split("."))
     return ext in (cpp_extensions + c_extensions)
 
 
+@lru_cache(maxsize=4)
+def open_archive(archive: Path) -> ZipFile:
+    """Archives stay open for the lifetime of the process, members are read on demand."""
+    return ZipFile(str(archive), 'r')
+
+
+def archive_members(archive: Path, folder: str = None) -> List[PurePosixPath]:
+    """Files directly inside the top level folders of the archive (or inside folder), skipping __MACOSX."""
+    members = []
+
+    for info in open_archive(archive).infolist():
+        member = PurePosixPath(info.filename)
+
+        if info.is_dir() or len(member.parts) != 2 or member.parts[0] == "__MACOSX":
+            continue
+
+        if folder is None or member.parts[0] == folder:
+            members.append(member)
+
+    return members
+
+
+def read_member(archive: Path, member: PurePosixPath, **kwargs) -> str:
+    """Reads a member as text, with the same newline handling as Path.open(mode='r')."""
+    with io.TextIOWrapper(open_archive(archive).open(str(member)), **kwargs) as m:
+        return m.read()
+
+
 def is_comment(string: str):
     if string.startswith('+') or string.startswith('-'):
         string = string[1:].strip()
@@ -51,18 +117,7 @@ def get_func_name(string: str):
 
 
 def comment_remover(code: str):
-    def replacer(match):
-        s = match.group(0)
-        if s.startswith('/'):
-            return " "  # note: a space and not an empty string
-        else:
-            return s
-
-    pattern = re.compile(
-        r'//.*?$|/\*.*?\*/|\'(?:\\.|[^\\\'])*\'|"(?:\\.|[^\\"])*"',
-        re.DOTALL | re.MULTILINE
-    )
-    return re.sub(pattern, replacer, code)
+    return strip_comments(code)
 
 
 def to_frame(data: List, name: str, out_path: Path):
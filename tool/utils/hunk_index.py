@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+from pathlib import Path
+from typing import List
+
+import numpy as np
+import pandas as pd
+
+from .storage import Storage, formats
+
+
+class HunkIndex:
+    """Persistent per-dataset occurrence counts of hunk fingerprints.
+
+    Each dataset owns one (fingerprint, count) file in the index folder, so datasets transformed concurrently
+    never write the same file, and a dataset can be checked against the rest of the corpus without loading it.
+    """
+    def __init__(self, storage: Storage, folder: Path):
+        self.storage = storage
+        self.folder = folder
+
+    def datasets(self) -> List[str]:
+        if not self.folder.exists():
+            return []
+        return sorted({f.stem for f in self.folder.iterdir() if f.suffix in formats.values()})
+
+    def update(self, name: str, fingerprints: np.ndarray):
+        values, counts = np.unique(fingerprints, return_counts=True)
+        frame = pd.DataFrame({'fingerprint': values.astype(np.int64), 'count': counts.astype(np.int64)})
+        self.storage.write(frame, self.storage.path(self.folder, name))
+
+    def load(self, name: str) -> pd.DataFrame:
+        return self.storage.read(self.storage.locate(self.folder, name))
+
+    def counts(self, fingerprints: np.ndarray, exclude: str = None) -> np.ndarray:
+        """Occurrences of each fingerprint in the indexed datasets other than exclude."""
+        totals = np.zeros(len(fingerprints), dtype=np.int64)
+
+        for name in self.datasets():
+            if name == exclude:
+                continue
+
+            indexed = self.load(name)
+
+            if indexed.empty:
+                continue
+
+            # fingerprints are stored sorted, so membership is a binary search on an integer column
+            values = indexed['fingerprint'].to_numpy()
+            positions = np.minimum(np.searchsorted(values, fingerprints), len(values) - 1)
+            totals += np.where(values[positions] == fingerprints, indexed['count'].to_numpy()[positions], 0)
+
+        return totals
+
+    def check(self, name: str, fingerprints: np.ndarray) -> int:
+        """Number of the given hunks that already occur in other datasets of the corpus."""
+        return int(np.count_nonzero(self.counts(np.unique(fingerprints), exclude=name)))
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+import sqlite3
+
+from pathlib import Path
+from typing import List
+
+import pandas as pd
+
+from .functions import hunk_columns
+
+# "commit" is an SQL keyword, columns are quoted wherever they are listed
+columns = ', '.join(f'"{column}"' for column in hunk_columns)
+updated = [column for column in hunk_columns if column != 'fingerprint']
+
+
+class HunkStore:
+    """SQLite database of the transformed and filtered hunks of the datasets, for indexed lookups.
+
+    A hunk is stored once per (dataset, stage, fingerprint); loading a dataset's hunks again upserts them, rewriting
+    only the rows that changed and deleting the ones no longer in the frame. The hunk text has an FTS5 index when
+    the SQLite build provides it, and is matched with LIKE otherwise.
+    """
+    def __init__(self, path: Path):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.connection = sqlite3.connect(str(path))
+        self.connection.executescript("""
+            CREATE TABLE IF NOT EXISTS hunks (id INTEGER PRIMARY KEY, dataset TEXT NOT NULL, stage TEXT NOT NULL,
+                project TEXT, "commit" TEXT, cve_year TEXT, cve_number TEXT, name TEXT, lang TEXT, hunk TEXT,
+                additions INTEGER, deletions INTEGER, hunk_name TEXT, changes INTEGER, fingerprint INTEGER NOT NULL,
+                UNIQUE (dataset, stage, fingerprint));
+            CREATE INDEX IF NOT EXISTS hunks_project ON hunks (project);
+            CREATE INDEX IF NOT EXISTS hunks_cve ON hunks (cve_year, cve_number);
+            CREATE INDEX IF NOT EXISTS hunks_lang ON hunks (lang);
+            CREATE INDEX IF NOT EXISTS hunks_changes ON hunks (changes);
+            CREATE TEMP TABLE IF NOT EXISTS loaded (fingerprint INTEGER PRIMARY KEY);
+        """)
+        self.fts = self._create_fts()
+
+    def _create_fts(self) -> bool:
+        try:
+            # external content table kept in sync with hunks by the triggers
+            self.connection.executescript("""
+                CREATE VIRTUAL TABLE IF NOT EXISTS hunks_fts USING fts5(hunk, content='hunks', content_rowid='id');
+                CREATE TRIGGER IF NOT EXISTS hunks_ai AFTER INSERT ON hunks BEGIN
+                    INSERT INTO hunks_fts (rowid, hunk) VALUES (new.id, new.hunk);
+                END;
+                CREATE TRIGGER IF NOT EXISTS hunks_ad AFTER DELETE ON hunks BEGIN
+                    INSERT INTO hunks_fts (hunks_fts, rowid, hunk) VALUES ('delete', old.id, old.hunk);
+                END;
+                CREATE TRIGGER IF NOT EXISTS hunks_au AFTER UPDATE OF hunk ON hunks BEGIN
+                    INSERT INTO hunks_fts (hunks_fts, rowid, hunk) VALUES ('delete', old.id, old.hunk);
+                    INSERT INTO hunks_fts (rowid, hunk) VALUES (new.id, new.hunk);
+                END;
+            """)
+            return True
+        except sqlite3.OperationalError as e:
+            print(f"Full-text search is not available, hunks are matched with LIKE: {e}")
+            return False
+
+    def load(self, dataset: str, stage: str, frame: pd.DataFrame) -> int:
+        """Upserts the hunks of a dataset's stage, and deletes its stored hunks that are not in the frame.
+
+        Returns the number of rows inserted, updated or deleted.
+        """
+        frame = frame.drop_duplicates(subset='fingerprint')
+        values = zip(*(frame[column].astype(object).where(frame[column].notna(), None).tolist()
+                       for column in hunk_columns))
+        changed = ' OR '.join(f'"{column}" IS NOT excluded."{column}"' for column in updated)
+        assignments = ', '.join(f'"{column}" = excluded."{column}"' for column in updated)
+
+        with self.connection:
+            self.connection.execute("DELETE FROM loaded")
+            # rows left as they were by the upsert are not counted
+            upserted = self.connection.executemany(
+                f"INSERT INTO hunks (dataset, stage, {columns}) VALUES (?, ?, {', '.join('?' * len(hunk_columns))}) "
+                f"ON CONFLICT (dataset, stage, fingerprint) DO UPDATE SET {assignments} WHERE {changed}",
+                ((dataset, stage, *row) for row in values)).rowcount
+            self.connection.executemany("INSERT INTO loaded VALUES (?)",
+                                        ((int(fingerprint),) for fingerprint in frame['fingerprint']))
+            deleted = self.connection.execute("DELETE FROM hunks WHERE dataset = ? AND stage = ? AND fingerprint "
+                                              "NOT IN (SELECT fingerprint FROM loaded)", (dataset, stage)).rowcount
+
+        return upserted + deleted
+
+    def query(self, datasets: List[str] = None, stage: str = None, project: str = None, cve: tuple = None,
+              lang: str = None, changes: int = None, text: str = None, limit: int = None) -> pd.DataFrame:
+        """Hunks matching every given condition; text is an FTS5 query over the hunks (a substring without FTS5)."""
+        filters = {'stage': stage, 'project': project, 'lang': lang, 'changes': changes}
+        conditions = [f"{column} = ?" for column, value in filters.items() if value is not None]
+        params = [value for value in filters.values() if value is not None]
+
+        if datasets:
+            conditions.append(f"dataset IN ({', '.join('?' * len(datasets))})")
+            params.extend(datasets)
+
+        if cve:
+            conditions.append("cve_year = ? AND cve_number = ?")
+            params.extend(cve)
+
+        if text and self.fts:
+            conditions.append("id IN (SELECT rowid FROM hunks_fts WHERE hunks_fts MATCH ?)")
+            params.append(text)
+        elif text:
+            conditions.append("hunk LIKE ?")
+            params.append(f"%{text}%")
+
+        sql = f"SELECT dataset, stage, {columns} FROM hunks"
+
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+
+        if limit:
+            sql += f" LIMIT {int(limit)}"
+
+        return pd.read_sql_query(sql, self.connection, params=params)
+
+    def close(self):
+        self.connection.close()
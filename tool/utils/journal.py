@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+import functools
+import json
+import os
+import threading
+
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+
+def output_files(output: Path) -> Dict[str, int]:
+    """Sizes of the files of an output, which is a single file or a folder of files."""
+    if output.is_dir():
+        return {f.name: f.stat().st_size for f in output.iterdir() if f.is_file()}
+    return {output.name: output.stat().st_size}
+
+
+class Journal:
+    """Append-only JSON lines checkpoint of the items of a collection, one line written and synced per item.
+
+    An interrupted write leaves at most a torn last line, which is ignored when the journal is loaded, so on
+    restart only the items without a verified output, and the failed ones when asked for, are collected again.
+    """
+    def __init__(self, path: Path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.entries = self._load()
+
+    def _load(self) -> Dict[str, dict]:
+        entries = {}
+
+        if not self.path.exists():
+            return entries
+
+        with self.path.open(mode="r") as j:
+            for line in j:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                # the last entry of an item wins
+                entries[entry['key']] = entry
+
+        return entries
+
+    def _append(self, entry: dict):
+        with self.lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+
+            with self.path.open(mode="a") as j:
+                j.write(json.dumps(entry) + "\n")
+                j.flush()
+                os.fsync(j.fileno())
+
+            self.entries[entry['key']] = entry
+
+    def done(self, key: Any, output: Optional[str]):
+        files = output_files(Path(output)) if output and Path(output).exists() else {}
+        self._append({'key': str(key), 'output': output, 'files': files})
+
+    def failed(self, key: Any, error: Exception):
+        self._append({'key': str(key), 'output': None, 'error': f"{type(error).__name__}: {error}"})
+
+    def verified(self, key: Any) -> bool:
+        """True when the item completed and the files it wrote are still there with the same size."""
+        entry = self.entries.get(str(key))
+
+        if entry is None or 'error' in entry:
+            return False
+
+        if entry['output'] is None:
+            return True
+
+        output = Path(entry['output'])
+
+        if output.is_dir():
+            # items can share a folder, so only the presence of the files written by this item is checked
+            return all((output / Path(name)).is_file() for name in entry['files'])
+
+        return output.is_file() and output.stat().st_size == entry['files'].get(output.name)
+
+    def pending(self, keys: Iterable[Any], retry_failed: bool = False) -> List[Any]:
+        """The keys still to collect: the new ones, the ones whose output is gone, and the failed if asked for."""
+        pending = []
+
+        for key in keys:
+            entry = self.entries.get(str(key))
+
+            if entry is not None and 'error' in entry:
+                if retry_failed:
+                    pending.append(key)
+            elif not self.verified(key):
+                pending.append(key)
+
+        return pending
+
+    def output(self, key: Any) -> Optional[str]:
+        entry = self.entries.get(str(key))
+        return entry['output'] if entry else None
+
+    def track(self, handler: Callable):
+        """Wraps a handler(key, ...) so that its result is checkpointed under key as soon as it returns."""
+        @functools.wraps(handler)
+        def wrapper_track(key, *args, **kwargs):
+            output = handler(key, *args, **kwargs)
+            self.done(key, output)
+            return output
+        return wrapper_track
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+import hashlib
+import pickle
+import sqlite3
+
+from pathlib import Path, PurePath
+from typing import Iterable, List, Optional, Union, Tuple
+
+from .functions import open_archive
+
+# a collected file, or an (archive, member) pair for inputs read straight from a zip
+Input = Union[Path, Tuple[Path, PurePath]]
+
+
+def file_digest(path: Path, chunk_size: int = 1 << 20) -> str:
+    sha256 = hashlib.sha256()
+
+    with path.open(mode="rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            sha256.update(chunk)
+
+    return sha256.hexdigest()
+
+
+def code_version(files: Iterable[Path]) -> str:
+    """Digest of the source files, so that cached results are invalidated when the code producing them changes."""
+    sha256 = hashlib.sha256()
+
+    for file in sorted(files):
+        sha256.update(file.read_bytes())
+
+    return sha256.hexdigest()
+
+
+class Manifest:
+    """SQLite manifest of input files (path, size, mtime, content hash) and the hunk rows parsed from each record.
+
+    File hashes are only recomputed when the size or mtime of a file changes.
+    """
+    def __init__(self, path: Path):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.connection = sqlite3.connect(str(path))
+        self.connection.execute("CREATE TABLE IF NOT EXISTS files (path TEXT PRIMARY KEY, size INTEGER, "
+                                "mtime_ns INTEGER, digest TEXT)")
+        self.connection.execute("CREATE TABLE IF NOT EXISTS rows (key TEXT PRIMARY KEY, rows BLOB)")
+        self.seen = set()
+        self.seen_files = set()
+
+    def digest(self, source: Input) -> str:
+        if isinstance(source, tuple):
+            archive, member = source
+            info = open_archive(archive).getinfo(str(member))
+            return f"{self.digest(archive)}:{member}:{info.CRC}:{info.file_size}"
+
+        self.seen_files.add(str(source))
+        stat = source.stat()
+        known = self.connection.execute("SELECT size, mtime_ns, digest FROM files WHERE path = ?",
+                                        (str(source),)).fetchone()
+
+        if known and known[0] == stat.st_size and known[1] == stat.st_mtime_ns:
+            return known[2]
+
+        digest = file_digest(source)
+        self.connection.execute("INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?)",
+                                (str(source), stat.st_size, stat.st_mtime_ns, digest))
+        return digest
+
+    def key(self, inputs: List[Input], record: dict, version: str) -> str:
+        """Signature of a record: the names and content of its inputs, its scalar fields and the code version."""
+        fields = sorted((k, v) for k, v in record.items() if isinstance(v, (str, int, float, bool, type(None))))
+        signature = repr(([(str(source), self.digest(source)) for source in inputs], fields, version))
+        key = hashlib.sha256(signature.encode()).hexdigest()
+        self.seen.add(key)
+
+        return key
+
+    def get(self, key: str) -> Optional[List[dict]]:
+        found = self.connection.execute("SELECT rows FROM rows WHERE key = ?", (key,)).fetchone()
+        return pickle.loads(found[0]) if found else None
+
+    def put(self, key: str, rows: List[dict]):
+        self.connection.execute("INSERT OR REPLACE INTO rows VALUES (?, ?)", (key, pickle.dumps(rows, protocol=4)))
+
+    def commit(self):
+        self.connection.commit()
+
+    def prune(self) -> int:
+        """Drops the rows of records and the files not seen in this run, e.g. deleted or changed inputs."""
+        self.connection.execute("CREATE TEMP TABLE seen (key TEXT PRIMARY KEY)")
+        self.connection.executemany("INSERT INTO seen VALUES (?)", ((key,) for key in self.seen))
+        removed = self.connection.execute("DELETE FROM rows WHERE key NOT IN (SELECT key FROM seen)").rowcount
+        self.connection.execute("DELETE FROM seen")
+        self.connection.executemany("INSERT INTO seen VALUES (?)", ((path,) for path in self.seen_files))
+        self.connection.execute("DELETE FROM files WHERE path NOT IN (SELECT key FROM seen)")
+        self.connection.execute("DROP TABLE seen")
+        self.connection.commit()
+
+        return removed
+
+    def close(self):
+        self.connection.close()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+import cProfile
+import os
+import time
+
+from dataclasses import dataclass, field, asdict
+from pathlib import Path
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+
+class Counters(dict):
+    """Named counts a dataset stage accumulates: records, hunks, bytes read and written, dropped hunks, ..."""
+    def add(self, key: str, value: int = 1):
+        self[key] = self.get(key, 0) + value
+
+
+def peak_rss_kb() -> int:
+    """Peak resident set size of this process and of its waited-for children (e.g. the transform workers)."""
+    if resource is None:
+        return None
+
+    return max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+               resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+
+
+def children_cpu() -> float:
+    times = os.times()
+    return times.children_user + times.children_system
+
+
+@dataclass
+class StageMetrics:
+    name: str
+    stage: str
+    wall_seconds: float = 0
+    cpu_seconds: float = 0
+    peak_rss_kb: int = None
+    counters: dict = field(default_factory=dict)
+
+    @property
+    def records_per_second(self) -> float:
+        return self.counters.get('records', 0) / self.wall_seconds if self.wall_seconds else 0
+
+    def to_dict(self) -> dict:
+        return dict(asdict(self), records_per_second=self.records_per_second)
+
+
+class Measure:
+    """Measures the block it wraps: wall time, CPU time and peak RSS, and dumps a cProfile of it to profile_dir.
+
+    CPU time is that of the calling thread plus that of the child processes that exited meanwhile, so stages
+    running concurrently in threads are told apart, while the children of concurrent stages are not.
+    """
+    def __init__(self, name: str, stage: str, profile_dir: Path = None):
+        self.metrics = StageMetrics(name=name, stage=stage)
+        self.counters = Counters()
+        self.profile_dir = profile_dir
+        self.profiler = None
+
+    def __enter__(self):
+        if self.profile_dir:
+            self.profiler = cProfile.Profile()
+
+            try:
+                self.profiler.enable()
+            except ValueError as e:
+                # a single profiler can be active at a time on recent Python versions
+                print(f"Not profiling {self.metrics.stage} {self.metrics.name}: {e}")
+                self.profiler = None
+
+        self.start = (time.perf_counter(), time.thread_time(), children_cpu())
+        return self
+
+    def __exit__(self, *args):
+        wall, cpu, children = self.start
+        self.metrics.wall_seconds = time.perf_counter() - wall
+        self.metrics.cpu_seconds = time.thread_time() - cpu + children_cpu() - children
+        self.metrics.peak_rss_kb = peak_rss_kb()
+        self.metrics.counters = dict(self.counters)
+
+        if self.profiler:
+            self.profiler.disable()
+            self.profile_dir.mkdir(parents=True, exist_ok=True)
+            self.profiler.dump_stats(str(self.profile_dir / Path(f"{self.metrics.stage}-{self.metrics.name}.prof")))
+
+        return False
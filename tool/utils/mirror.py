@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+import subprocess
+
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from .functions import cpp_extensions, c_extensions
+
+# only C/C++ files are diffed, which keeps the batched log output small
+pathspecs = [f"*.{ext}" for ext in c_extensions + cpp_extensions]
+
+
+def split_files(diff: str) -> List[dict]:
+    """Splits the 'git log -p' output of one commit into GitHub-like {'filename', 'patch'} payloads."""
+    files = []
+
+    for block in diff.split("\ndiff --git ")[1:]:
+        lines = block.split('\n')
+        old_name, new_name, patch = None, None, None
+
+        for i, line in enumerate(lines):
+            if line.startswith('--- '):
+                old_name = line[4:].rstrip('\t')
+            elif line.startswith('+++ '):
+                new_name = line[4:].rstrip('\t')
+            elif line.startswith('@@'):
+                patch = '\n'.join(lines[i:]).rstrip('\n')
+                break
+
+        name = new_name if new_name and new_name != '/dev/null' else old_name
+
+        if name is None:
+            continue
+
+        files.append({'filename': name[2:] if name.startswith(('a/', 'b/')) else name, 'patch': patch})
+
+    return files
+
+
+class GitMirror:
+    """Local bare mirror of a repository from which commit diffs are read without network calls."""
+    def __init__(self, root: Path, repo: str, url: str = None):
+        self.repo = repo
+        self.url = url if url else f"https://github.com/{repo}.git"
+        self.path = root / Path(f"{repo.replace('/', '_')}.git")
+
+    def git(self, *args, stdin: str = None) -> str:
+        result = subprocess.run(["git", "-c", "core.quotePath=false", "--git-dir", str(self.path), *args],
+                                input=stdin.encode() if stdin else None, stdout=subprocess.PIPE,
+                                stderr=subprocess.PIPE, check=True)
+        return result.stdout.decode("utf-8", errors="replace")
+
+    def resolve(self, shas: List[str]) -> Dict[str, str]:
+        """Maps each requested sha available in the mirror to its full commit hash."""
+        if not self.path.exists():
+            return {}
+
+        output = self.git("cat-file", "--batch-check", stdin=''.join(f"{sha}^{{commit}}\n" for sha in shas))
+
+        return {sha: line.split()[0] for sha, line in zip(shas, output.splitlines()) if not line.endswith("missing")}
+
+    def sync(self, shas: List[str]) -> Dict[str, str]:
+        """Clones or updates the mirror only when some of the requested commits are not available locally."""
+        resolved = self.resolve(shas)
+
+        if len(resolved) == len(shas):
+            return resolved
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+        if self.path.exists():
+            print(f"Fetching mirror {self.path.name}")
+            self.git("remote", "update", "--prune")
+        else:
+            print(f"Cloning mirror {self.url}")
+            subprocess.run(["git", "clone", "--mirror", "--quiet", self.url, str(self.path)], check=True,
+                           stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+
+        return self.resolve(shas)
+
+    def commit_files(self, shas: List[str]) -> Dict[str, List[dict]]:
+        """Extracts the C/C++ file diffs of every commit in one 'git log -p' pass."""
+        resolved = self.sync(shas)
+
+        if not resolved:
+            return {}
+
+        output = self.git("log", "--stdin", "--no-walk=unsorted", "--diff-merges=first-parent", "-p", "--no-color",
+                          "--no-ext-diff", "--format=%x00%H", "--", *pathspecs,
+                          stdin=''.join(f"{full}\n" for full in set(resolved.values())))
+        diffs = {}
+
+        for chunk in output.split('\x00')[1:]:
+            full, _, diff = chunk.partition('\n')
+            diffs[full] = split_files('\n' + diff)
+
+        return {sha: diffs.get(full, []) for sha, full in resolved.items()}
+
+
+class MirrorFetcher:
+    """Drop-in for CommitFetcher that reads commits from one local mirror per repository."""
+    def __init__(self, root: Path, workers: int = 8, urls: Dict[str, str] = None):
+        self.root = root
+        self.workers = max(1, workers)
+        self.urls = urls if urls else {}
+
+    def __call__(self, commits: Dict[str, List[str]]) -> Dict[Tuple[str, str], Optional[List[dict]]]:
+        payloads = {}
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            futures = {executor.submit(self._fetch_repo, repo, list(set(shas))): (repo, shas)
+                       for repo, shas in commits.items()}
+
+            for future in as_completed(futures):
+                repo, shas = futures[future]
+
+                try:
+                    files = future.result()
+                except Exception as e:
+                    with open("exceptions.log", "a") as ex:
+                        ex.write(f"{repo}:\n{e}\n")
+                    files = {}
+
+                payloads.update({(repo, sha): files.get(sha) for sha in shas})
+
+        return payloads
+
+    def _fetch_repo(self, repo: str, shas: List[str]):
+        mirror = GitMirror(self.root, repo, self.urls.get(repo))
+        return mirror.commit_files(shas)
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+import re
+import zlib
+
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Tuple
+
+import numpy as np
+import pandas as pd
+
+token_pattern = re.compile(r'\w+|[^\w\s]')
+# hashes and permutations are taken modulo a prime under 2^31, so that a * hash + b fits in 64 bits
+prime = (1 << 31) - 1
+
+
+def shingles(hunk: str, size: int = 3) -> np.ndarray:
+    """Hashes of the runs of size tokens of the hunk, whose tokens are prefixed with the kind of their line (+, -, ' ').
+
+    Whitespace is not part of any token, so hunks differing only in indentation or spacing have the same shingles.
+    """
+    tokens = [line[:1] + token for line in hunk.split('\n') for token in token_pattern.findall(line[1:])]
+    grams = {' '.join(tokens[i:i + size]) for i in range(max(1, len(tokens) - size + 1))}
+    return np.array([zlib.crc32(gram.encode()) & prime for gram in grams if gram], dtype=np.uint64)
+
+
+class MinHash:
+    """MinHash signatures of hunks under num_perm random linear permutations of their shingle hashes."""
+    def __init__(self, num_perm: int = 128, seed: int = 1):
+        state = np.random.RandomState(seed)
+        self.a = state.randint(1, prime, size=num_perm).astype(np.uint64)
+        self.b = state.randint(0, prime, size=num_perm).astype(np.uint64)
+
+    def __call__(self, hunk: str) -> np.ndarray:
+        hashes = shingles(hunk)
+
+        if not len(hashes):
+            return np.full(len(self.a), prime, dtype=np.uint32)
+
+        return ((np.outer(hashes, self.a) + self.b) % prime).min(axis=0).astype(np.uint32)
+
+    def signatures(self, hunks: List[str]) -> np.ndarray:
+        return np.vstack([self(hunk) for hunk in hunks]) if hunks else np.empty((0, len(self.a)), dtype=np.uint32)
+
+
+def band_rows(threshold: float, num_perm: int) -> Tuple[int, int]:
+    """Bands and rows per band whose LSH threshold (1 / bands) ^ (1 / rows) is the closest to threshold."""
+    candidates = [(num_perm // rows, rows) for rows in range(1, num_perm + 1)]
+    return min(candidates, key=lambda br: abs((1 / br[0]) ** (1 / br[1]) - threshold))
+
+
+def signatures(hunks: List[str], num_perm: int = 128, workers: int = 1, chunk_size: int = 1000) -> np.ndarray:
+    minhash = MinHash(num_perm)
+    chunks = [hunks[start:start + chunk_size] for start in range(0, len(hunks), chunk_size)]
+
+    if workers > 1 and len(chunks) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            parts = list(executor.map(minhash.signatures, chunks))
+    else:
+        parts = [minhash.signatures(chunk) for chunk in chunks]
+
+    return np.vstack(parts) if parts else minhash.signatures([])
+
+
+def candidate_pairs(sigs: np.ndarray, threshold: float) -> np.ndarray:
+    """Pairs of hunks sharing a band of their signatures whose estimated Jaccard is >= threshold.
+
+    Every hunk of a bucket is paired with the first hunk of the bucket only, so that the pairs stay linear in the
+    number of hunks.
+    """
+    bands, rows = band_rows(threshold, sigs.shape[1])
+    pairs = []
+
+    for band in range(bands):
+        keys = np.ascontiguousarray(sigs[:, band * rows:(band + 1) * rows])
+        _, buckets = np.unique(keys.view(np.dtype((np.void, keys.dtype.itemsize * rows))), return_inverse=True)
+        order = np.argsort(buckets.ravel(), kind='stable')
+        sorted_buckets = buckets.ravel()[order]
+        starts = np.ones(len(order), dtype=bool)
+        starts[1:] = sorted_buckets[1:] != sorted_buckets[:-1]
+        # position of the first hunk of the bucket of each position
+        firsts = order[np.maximum.accumulate(np.where(starts, np.arange(len(order)), 0))]
+        band_pairs = np.column_stack((firsts, order))[~starts]
+        similar = (sigs[band_pairs[:, 0]] == sigs[band_pairs[:, 1]]).mean(axis=1) >= threshold
+        pairs.append(band_pairs[similar])
+
+    return np.unique(np.vstack(pairs), axis=0) if pairs else np.empty((0, 2), dtype=np.int64)
+
+
+def clusters(sigs: np.ndarray, threshold: float) -> np.ndarray:
+    """Cluster of each hunk: the lowest index of the hunks it is linked to by candidate pairs."""
+    parent = list(range(len(sigs)))
+
+    def find(i: int) -> int:
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    for first, other in candidate_pairs(sigs, threshold).tolist():
+        root, other_root = find(first), find(other)
+
+        if root != other_root:
+            parent[max(root, other_root)] = min(root, other_root)
+
+    return np.array([find(i) for i in range(len(sigs))], dtype=np.int64)
+
+
+def near_dedupe(frame: pd.DataFrame, threshold: float = 0.8, keep: str = 'first', num_perm: int = 128,
+                workers: int = 1) -> pd.DataFrame:
+    """Adds the cluster of near-duplicate hunks of each row, and keeps one row of each cluster (all with 'all')."""
+    sigs = signatures(frame['hunk'].tolist(), num_perm=num_perm, workers=workers)
+    roots = clusters(sigs, threshold)
+    frame = frame.assign(cluster=np.unique(roots, return_inverse=True)[1].ravel())
+
+    if keep == 'all':
+        return frame
+
+    return frame[~frame['cluster'].duplicated(keep=keep)].reset_index(drop=True)
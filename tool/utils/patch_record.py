@@ -1,6 +1,7 @@
 #!/usr/bin/env python3
 
 from .code_parser import Patch
+from .functions import fingerprint
 from typing import List
 
 
@@ -27,18 +28,18 @@ class PatchRecord:
     def to_dict(self):
         records = []
         for patch in self.patches:
-            for diff in patch:
-                for hunk in diff:
-                    records.append({'project': self.project,
-                                    'commit': self.commit,
-                                    'cve_year': self.year,
-                                    'cve_number': self.number,
-                                    'name': diff.name,
-                                    'lang': diff.lang,
-                                    'hunk': '\n'.join(hunk.lines),
-                                    'additions': hunk.additions,
-                                    'deletions': hunk.deletions,
-                                    'hunk_name': hunk.name,
-                                    'changes': hunk.changes
-                                    })
+            for name, lang, hunk, additions, deletions, hunk_name, changes in patch.rows():
+                records.append({'project': self.project,
+                                'commit': self.commit,
+                                'cve_year': self.year,
+                                'cve_number': self.number,
+                                'name': name,
+                                'lang': lang,
+                                'hunk': hunk,
+                                'additions': additions,
+                                'deletions': deletions,
+                                'hunk_name': hunk_name,
+                                'changes': changes,
+                                'fingerprint': fingerprint(hunk)
+                                })
         return records
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+import traceback
+
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List
+
+from utils.data_structs import DataPaths, Dataset
+from utils.metrics import Measure, StageMetrics
+
+
+@dataclass
+class Status:
+    name: str
+    stage: str
+    ok: bool
+    seconds: float
+    result: Any = None
+    error: str = None
+    metrics: StageMetrics = None
+
+    def __str__(self):
+        state = "done" if self.ok else f"failed ({self.error.strip().splitlines()[-1]})"
+        return f"{self.stage} {self.name}: {state} in {self.seconds:.1f}s"
+
+
+def run_stage(stage: str, ds: Dataset, paths: DataPaths, options: dict, profile_dir: Path = None) -> Status:
+    """Runs one stage of one dataset, turning any failure into a failed Status, and measures it."""
+    measure = Measure(name=ds.name, stage=stage, profile_dir=profile_dir)
+
+    try:
+        with measure:
+            data_set = ds.cls(name=ds.name, paths=paths, **options)
+
+            try:
+                if stage in ("collect", "run"):
+                    result = getattr(data_set, stage)(ds.source)
+                else:
+                    result = getattr(data_set, stage)()
+            finally:
+                measure.counters.update(data_set.counters)
+
+            # counters of the filter plan that produced the frame
+            measure.counters.update(getattr(result, 'attrs', {}).get('counters', {}))
+
+        return Status(name=ds.name, stage=stage, ok=True, seconds=measure.metrics.wall_seconds, result=result,
+                      metrics=measure.metrics)
+    except Exception:
+        return Status(name=ds.name, stage=stage, ok=False, seconds=measure.metrics.wall_seconds,
+                      error=traceback.format_exc(), metrics=measure.metrics)
+
+
+class Scheduler:
+    """Runs a stage for independent datasets concurrently.
+
+    I/O-bound stages share a thread pool of io_jobs, CPU-bound stages a process pool of cpu_jobs; with a single
+    job the stage runs in the calling process.
+    """
+    def __init__(self, io_jobs: int = 4, cpu_jobs: int = 1, profile_dir: Path = None):
+        self.limits = {'io': max(1, io_jobs), 'cpu': max(1, cpu_jobs)}
+        self.profile_dir = profile_dir
+
+    def __call__(self, stage: str, kind: str, datasets: List[Dataset], paths: DataPaths,
+                 options: dict) -> Dict[str, Status]:
+        jobs = min(self.limits[kind], len(datasets))
+        statuses = {}
+
+        if jobs <= 1:
+            for ds in datasets:
+                statuses[ds.name] = run_stage(stage, ds, paths, options, self.profile_dir)
+                print(statuses[ds.name])
+            return statuses
+
+        executor_cls = ThreadPoolExecutor if kind == 'io' else ProcessPoolExecutor
+
+        with executor_cls(max_workers=jobs) as executor:
+            futures = {executor.submit(run_stage, stage, ds, paths, options, self.profile_dir): ds for ds in datasets}
+
+            for future in as_completed(futures):
+                ds = futures[future]
+
+                try:
+                    statuses[ds.name] = future.result()
+                except Exception:
+                    # e.g. a worker process killed by the OOM killer
+                    statuses[ds.name] = Status(name=ds.name, stage=stage, ok=False, seconds=0,
+                                               error=traceback.format_exc())
+                print(statuses[ds.name])
+
+        # report in the order the datasets were requested
+        return {ds.name: statuses[ds.name] for ds in datasets}
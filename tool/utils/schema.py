@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+from typing import List
+
+import numpy as np
+import pandas as pd
+
+from pandas.api.types import union_categoricals
+
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
+# dtypes of the hunk columns; the strings repeated across hunks are categoricals, so each distinct project, commit,
+# file name, ... is stored once per frame and the hunks hold small integer codes (the hunk text stays a string)
+dtypes = {'project': 'category', 'commit': 'category', 'cve_year': 'category', 'cve_number': 'category',
+          'name': 'category', 'lang': 'category', 'additions': 'int32', 'deletions': 'int32',
+          'hunk_name': 'category', 'changes': 'int32', 'fingerprint': 'int64'}
+category_columns = [column for column, dtype in dtypes.items() if dtype == 'category']
+string_columns = category_columns + ['hunk']
+
+
+def arrow_schema(columns: List[str]):
+    """Arrow schema of the hunk columns, with the categoricals as dictionary arrays."""
+    def arrow_type(column: str):
+        if column not in dtypes:
+            return pa.string()
+
+        if dtypes[column] == 'category':
+            return pa.dictionary(pa.int32(), pa.string())
+
+        return pa.from_numpy_dtype(np.dtype(dtypes[column]))
+
+    return pa.schema([(column, arrow_type(column)) for column in columns])
+
+
+def conform(frame: pd.DataFrame, prune: bool = False) -> pd.DataFrame:
+    """The frame with the hunk columns it has cast to the compact schema; prune drops unused categories."""
+    columns = {}
+
+    for column, dtype in dtypes.items():
+        if column not in frame.columns:
+            continue
+
+        series = frame[column]
+
+        if dtype != 'category':
+            if series.dtype != dtype:
+                columns[column] = series.astype(dtype)
+        elif not isinstance(series.dtype, pd.CategoricalDtype):
+            # legacy frames may hold other values, e.g. int years, which would make categories of another dtype
+            columns[column] = series.where(series.isna(), series.astype(str)).astype('category')
+        elif not pd.api.types.is_string_dtype(series.cat.categories):
+            columns[column] = series.cat.rename_categories(series.cat.categories.astype(str))
+        elif prune:
+            columns[column] = series.cat.remove_unused_categories()
+
+    return frame.assign(**columns) if columns else frame
+
+
+class Dictionaries:
+    """Categories of the categorical columns over a sequence of frames, which they are all set to.
+
+    Categories are only ever appended, so the dictionaries of successive frames extend the previous ones, as the
+    Arrow IPC file format requires of dictionary deltas.
+    """
+    def __init__(self):
+        self.categories = {}
+
+    def __call__(self, frame: pd.DataFrame) -> pd.DataFrame:
+        frame = conform(frame)
+        columns = {}
+
+        for column in category_columns:
+            if column not in frame.columns:
+                continue
+
+            new = frame[column].cat.categories
+            known = self.categories.get(column)
+            known = new if known is None else known.append(new[~new.isin(known)])
+            self.categories[column] = known
+            columns[column] = frame[column].cat.set_categories(known)
+
+        return frame.assign(**columns) if columns else frame
+
+
+def concat(frames: List[pd.DataFrame]) -> pd.DataFrame:
+    """Concatenates hunk frames into one with the union of their categories, which pd.concat would turn to objects."""
+    frames = [conform(frame) for frame in frames]
+    columns = [column for column in category_columns if all(column in frame.columns for frame in frames)]
+    result = pd.concat([frame.drop(columns=columns) for frame in frames], ignore_index=True, sort=False)
+
+    for column in columns:
+        result[column] = union_categoricals([frame[column] for frame in frames])
+
+    return result[[column for column in frames[0].columns if column in result.columns] +
+                  [column for column in result.columns if column not in frames[0].columns]]
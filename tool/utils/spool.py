@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+import shutil
+
+from pathlib import Path
+from typing import List, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .functions import hunk_columns
+from .schema import string_columns, arrow_schema, conform, concat, Dictionaries
+from .storage import Storage, formats
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+
+
+def to_frame(rows: List[dict]) -> pd.DataFrame:
+    """Hunk rows as a frame in the compact schema, whose string columns hold only strings."""
+    frame = pd.DataFrame(rows, columns=hunk_columns)
+
+    for column in string_columns:
+        frame[column] = frame[column].where(frame[column].isna(), frame[column].astype(str))
+
+    return conform(frame)
+
+
+class HunkSpool:
+    """Collects hunk rows in bounded batches that are flushed to part files as they fill up.
+
+    finalize() merges the parts into the output file, dropping every hunk whose fingerprint occurs more than once,
+    in a streaming pass for the columnar formats; pickle output has to be assembled in memory.
+    """
+    def __init__(self, storage: Storage, parts_dir: Path, batch_size: int = 50000):
+        self.storage = storage
+        self.parts_dir = parts_dir
+        self.batch_size = batch_size
+        self.rows = []
+        self.parts = []
+
+        if self.parts_dir.exists():
+            shutil.rmtree(str(self.parts_dir))
+
+    def extend(self, rows: List[dict]):
+        self.rows.extend(rows)
+
+        if len(self.rows) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if not self.rows:
+            return
+
+        self.parts_dir.mkdir(parents=True, exist_ok=True)
+        part = self.parts_dir / Path(f"part-{len(self.parts):05d}{self.storage.suffix}")
+        self.storage.write(to_frame(self.rows), part)
+        self.parts.append(part)
+        self.rows = []
+
+    def read_parts(self):
+        for part in self.parts:
+            yield self.storage.read(part)
+
+    def to_frame(self) -> Tuple[pd.DataFrame, np.ndarray]:
+        """The unique hunks of rows that were never flushed, as a frame, and every fingerprint seen."""
+        frame = to_frame(self.rows)
+        fingerprints = frame['fingerprint'].to_numpy(dtype=np.int64)
+        self.rows = []
+
+        return frame[~frame['fingerprint'].duplicated(keep=False)].reset_index(drop=True), fingerprints
+
+    def finalize(self, out_file: Path) -> Tuple[np.ndarray, int]:
+        """Writes the unique hunks to out_file and returns every fingerprint seen and the unique hunks count."""
+        self.flush()
+        fingerprints = [self.storage.read(part, columns=['fingerprint'])['fingerprint'].to_numpy(dtype=np.int64)
+                        for part in self.parts]
+        all_fingerprints = np.concatenate(fingerprints) if fingerprints else np.array([], dtype=np.int64)
+        values, counts = np.unique(all_fingerprints, return_counts=True)
+        repeated = values[counts > 1]
+        frames = (frame[~np.isin(part_fingerprints, repeated)]
+                  for frame, part_fingerprints in zip(self.read_parts(), fingerprints))
+        unique = self._write(frames, out_file)
+        shutil.rmtree(str(self.parts_dir), ignore_errors=True)
+
+        return all_fingerprints, unique
+
+    def _write(self, frames, out_file: Path) -> int:
+        out_file.parent.mkdir(parents=True, exist_ok=True)
+
+        if out_file.suffix == formats['pickle'] or not self.parts:
+            frame = concat(list(frames)) if self.parts else to_frame([])
+            self.storage.write(frame, out_file)
+            return len(frame)
+
+        schema = arrow_schema(hunk_columns)
+        dictionaries = Dictionaries()
+        writer, unique = None, 0
+
+        for frame in frames:
+            table = pa.Table.from_pandas(dictionaries(frame), schema=schema, preserve_index=False)
+
+            if writer is None:
+                if out_file.suffix == formats['parquet']:
+                    writer = pq.ParquetWriter(str(out_file), schema)
+                else:
+                    # the categories of each part extend those of the previous ones, written as dictionary deltas
+                    writer = pa.ipc.new_file(str(out_file), schema,
+                                             options=pa.ipc.IpcWriteOptions(emit_dictionary_deltas=True))
+
+            if out_file.suffix == formats['parquet']:
+                writer.write_table(table, row_group_size=self.storage.row_group_size)
+            else:
+                writer.write_table(table)
+
+            unique += len(frame)
+
+        writer.close()
+        self.storage.count('bytes_written', out_file)
+
+        return unique
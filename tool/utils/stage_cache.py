@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+import hashlib
+
+from pathlib import Path
+from typing import Optional
+
+from .manifest import Manifest
+
+
+def stage_key(*inputs) -> str:
+    """Key of a stage run from the repr of its inputs: input fingerprints, code version and options."""
+    return hashlib.sha256(repr(inputs).encode()).hexdigest()
+
+
+class StageCache(Manifest):
+    """Key and output fingerprint of the last run of each stage of a dataset.
+
+    A stage whose key is the one of its last run, and whose output is unchanged since, is up to date. Output
+    fingerprints are file digests, which the manifest only recomputes for files whose size or mtime changed.
+    """
+    def __init__(self, path: Path):
+        super().__init__(path)
+        self.connection.execute("CREATE TABLE IF NOT EXISTS stages (stage TEXT PRIMARY KEY, key TEXT, output TEXT)")
+
+    def fingerprint(self, output: Path) -> Optional[str]:
+        """Digest of the output file, or of the names and digests of the files under the output folder."""
+        if output.is_file():
+            return self.digest(output)
+
+        files = sorted(file for file in output.rglob("*") if file.is_file()) if output.is_dir() else []
+
+        if not files:
+            return None
+
+        return stage_key(*((str(file.relative_to(output)), self.digest(file)) for file in files))
+
+    def lookup(self, stage: str, key: str, output: Path) -> Optional[str]:
+        """Fingerprint of the stage's output if its last run had this key and the output is unchanged, else None."""
+        found = self.connection.execute("SELECT key, output FROM stages WHERE stage = ?", (stage,)).fetchone()
+
+        if found and found[0] == key and found[1] is not None and self.fingerprint(output) == found[1]:
+            return found[1]
+
+        return None
+
+    def record(self, stage: str, key: str, output: Path) -> Optional[str]:
+        fingerprint = self.fingerprint(output)
+        self.connection.execute("INSERT OR REPLACE INTO stages VALUES (?, ?, ?)", (stage, key, fingerprint))
+        self.commit()
+
+        return fingerprint
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+import operator
+
+from pathlib import Path
+from typing import List, Tuple, Any, Optional
+
+import pandas as pd
+
+from .metrics import Counters
+from .schema import conform
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.feather as feather
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+# format: file suffix
+formats = {'pickle': '.pkl', 'parquet': '.parquet', 'feather': '.arrow'}
+comparisons = {'==': operator.eq, '!=': operator.ne, '<': operator.lt, '<=': operator.le, '>': operator.gt,
+               '>=': operator.ge}
+
+Predicate = Tuple[str, str, Any]
+
+
+def to_expression(predicates: List[Predicate]):
+    """Conjunction of (column, op, value) predicates as a pyarrow expression."""
+    expression = None
+
+    for column, op, value in predicates:
+        field = pc.field(column)
+        condition = field.isin(value) if op == 'in' else comparisons[op](field, value)
+        expression = condition if expression is None else expression & condition
+
+    return expression
+
+
+class Storage:
+    """Reads and writes hunk frames as pickles or, with pyarrow installed, as Parquet or Arrow IPC files.
+
+    Columnar files are read memory-mapped, only for the requested columns, and (column, op, value) predicates
+    are pushed down so that Parquet row groups whose statistics exclude them are skipped. The bytes of the files
+    read and written are added to the counters.
+    """
+    def __init__(self, data_format: str = 'pickle', row_group_size: int = 1 << 16, counters: Counters = None):
+        if data_format != 'pickle' and pa is None:
+            raise ImportError(f"pyarrow is required for the {data_format} format.")
+
+        self.data_format = data_format
+        self.row_group_size = row_group_size
+        self.counters = counters if counters is not None else Counters()
+
+    def count(self, key: str, path: Path):
+        self.counters.add(key, path.stat().st_size)
+
+    @property
+    def suffix(self) -> str:
+        return formats[self.data_format]
+
+    def path(self, folder: Path, name: str) -> Path:
+        return folder / Path(name + self.suffix)
+
+    def locate(self, folder: Path, name: str) -> Path:
+        """The file of name in this format, falling back to one written in another format."""
+        path = self.path(folder, name)
+
+        if not path.exists():
+            for suffix in formats.values():
+                if (folder / Path(name + suffix)).exists():
+                    return folder / Path(name + suffix)
+
+        return path
+
+    def write(self, frame: pd.DataFrame, path: Path):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        frame = conform(frame, prune=True)
+
+        if path.suffix == formats['parquet']:
+            table = pa.Table.from_pandas(frame, preserve_index=False)
+            pq.write_table(table, str(path), row_group_size=self.row_group_size, write_statistics=True)
+        elif path.suffix == formats['feather']:
+            # uncompressed IPC files can be memory-mapped without copying
+            feather.write_feather(frame.reset_index(drop=True), str(path), compression='uncompressed')
+        else:
+            frame.to_pickle(str(path), protocol=4)
+
+        self.count('bytes_written', path)
+
+    def read(self, path: Path, columns: List[str] = None, predicates: List[Predicate] = None) -> pd.DataFrame:
+        # memory-mapped files are only partly read, this is the size of the whole file
+        self.count('bytes_read', path)
+
+        if path.suffix == formats['parquet']:
+            table = pq.read_table(str(path), columns=columns, filters=predicates if predicates else None,
+                                  memory_map=True)
+            return conform(table.to_pandas())
+
+        if path.suffix == formats['feather']:
+            table = feather.read_table(str(path), columns=columns, memory_map=True)
+
+            if predicates:
+                table = table.filter(to_expression(predicates))
+
+            return conform(table.to_pandas())
+
+        # frames written before the compact schema are cast to it
+        frame = pd.read_pickle(str(path))
+        return conform(frame[columns] if columns else frame)
+
+
+class Source:
+    """Lazy handle on a stored frame that a filter plan reads with its columns and predicates."""
+    def __init__(self, storage: Storage, path: Path):
+        self.storage = storage
+        self.path = path
+
+    def read(self, columns: List[str] = None, predicates: List[Predicate] = None) -> pd.DataFrame:
+        return self.storage.read(self.path, columns=columns, predicates=predicates)
+
+    def rows(self) -> Optional[int]:
+        """Number of rows of the stored frame from the file metadata, None for pickles which are read whole."""
+        if self.path.suffix == formats['parquet']:
+            return pq.ParquetFile(str(self.path)).metadata.num_rows
+
+        if self.path.suffix == formats['feather']:
+            return feather.read_table(str(self.path), memory_map=True).num_rows
+
+        return None